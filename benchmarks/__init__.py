@@ -0,0 +1 @@
+"""性能基准与本地模拟百度翻译接口（不随应用部署）"""
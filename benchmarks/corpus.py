@@ -0,0 +1,45 @@
+"""合成评论语料：模拟真实导出中的重复评论（短好评、重复导出的同一条评论等）"""
+import random
+
+# 高频短评，真实数据里大量重复
+COMMON_REVIEWS = [
+    "Good product!", "Fast shipping", "Great quality, love it", "Terrible quality!", "As described",
+    "Works perfectly", "Not worth the money", "Arrived broken", "Five stars", "Would recommend",
+]
+OPENINGS = [
+    "I bought this {item} for my {person}", "The {item} arrived {when}", "Ordered the {item} last month",
+    "This is my second {item} from this seller", "Honestly the {item}",
+]
+POSITIVE = [
+    "and it works great", "the quality is excellent", "my {person} loves it", "best purchase this year",
+    "really satisfied with it", "it looks nice and feels solid",
+]
+NEGATIVE = [
+    "but it stopped working after {n} days", "the quality is poor", "it was defective out of the box",
+    "what a waste of money", "shipping was slow and the box was broken", "very disappointed with the seller",
+]
+NEUTRAL = ["it is okay for the price", "nothing special", "it does the job", "the color is a bit different"]
+ITEMS = ["phone case", "charger", "lamp", "backpack", "water bottle", "keyboard", "blender", "headphones"]
+PEOPLE = ["wife", "husband", "son", "daughter", "mom", "dad", "friend", "office"]
+WHEN = ["early", "on time", "two days late", "in a damaged box"]
+
+def _compose(rng):
+    opening = rng.choice(OPENINGS).format(item=rng.choice(ITEMS), person=rng.choice(PEOPLE), when=rng.choice(WHEN))
+    body = rng.choice(rng.choice([POSITIVE, NEGATIVE, NEUTRAL])).format(person=rng.choice(PEOPLE), n=rng.randint(2, 30))
+    text = f"{opening}, {body}."
+    # 少量多行评论，覆盖按行拆分翻译的路径
+    if rng.random() < 0.05:
+        text += f"\nUpdate: {rng.choice(rng.choice([POSITIVE, NEGATIVE])).format(person=rng.choice(PEOPLE), n=rng.randint(2, 30))}."
+    return text
+
+def make_corpus(size, duplicate_rate=0.35, seed=42):
+    """生成 size 条评论；duplicate_rate 比例的评论是高频短评或之前出现过的评论"""
+    rng = random.Random(seed)
+    comments = []
+    for _ in range(size):
+        if comments and rng.random() < duplicate_rate:
+            # 一半取高频短评，一半重复之前出现过的长评论
+            comments.append(rng.choice(COMMON_REVIEWS) if rng.random() < 0.5 else rng.choice(comments))
+        else:
+            comments.append(_compose(rng))
+    return comments
@@ -0,0 +1,39 @@
+"""进程内模拟翻译后端（路由/故障切换联调用，不走 HTTP）
+
+可配置延迟、随机错误率（默认返回 54003 限流）、费用和每日额度；译文为「〔目标语言·后端名〕原文」。
+用法：register_backend("backup", lambda: backup) 后把 "backup" 加入 config.TRANSLATE_BACKENDS。
+"""
+import random
+import threading
+import time
+from collections import Counter
+
+from comment_translator.engine import TranslationBackend
+
+class MockBackend(TranslationBackend):
+    """stats 记录批次数、字符数和各错误码次数；supported 给定时只支持其中的目标语言"""
+    def __init__(self, name="mock", latency=0.02, jitter=0.01, error_rate=0.0, error_code="54003",
+                 cost_per_million_chars=0.0, daily_char_quota=0, supported=None):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.cost_per_million_chars = cost_per_million_chars
+        self.daily_char_quota = daily_char_quota
+        self.supported = supported
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def supports(self, from_lang, to_lang):
+        return self.supported is None or to_lang in self.supported
+
+    def translate_lines(self, lines, from_lang="en", to_lang="zh"):
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        with self.lock:
+            self.stats["requests"] += 1
+            if random.random() < self.error_rate:
+                self.stats[f"error_{self.error_code}"] += 1
+                return None, {"code": self.error_code, "message": "模拟错误"}
+            self.stats["chars"] += sum(len(line) for line in lines)
+        return [f"〔{to_lang}·{self.name}〕{line}" for line in lines], None
@@ -0,0 +1,147 @@
+"""本地模拟百度通用翻译接口（压测/联调用，不消耗真实额度）
+
+校验 MD5 签名，可配置响应延迟、随机错误率和 QPS 上限（超限返回 54003）。
+单独运行：python -m benchmarks.mock_baidu --port 8765 --latency 0.05 --qps 10
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+API_PATH = "/api/trans/vip/translate"
+
+class MockBaiduServer:
+    """模拟服务：start() 后通过 url 访问，stats 记录请求数和各错误码次数"""
+    def __init__(self, app_id="bench-app", secret_key="bench-secret", latency=0.02, jitter=0.01,
+                 error_rate=0.0, qps=None, host="127.0.0.1", port=0):
+        self.app_id = app_id
+        self.secret_key = secret_key
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.qps = qps
+        self.stats = Counter()
+        self.lock = threading.Lock()
+        self._recent = deque()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PATH}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-baidu", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _throttled(self):
+        """1秒滑动窗口内的请求数超过 QPS 上限即限流"""
+        if not self.qps:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            while self._recent and now - self._recent[0] >= 1:
+                self._recent.popleft()
+            if len(self._recent) >= self.qps:
+                return True
+            self._recent.append(now)
+            return False
+
+    def handle(self, params):
+        """按百度接口的规则处理一次请求，返回响应 JSON"""
+        with self.lock:
+            self.stats["requests"] += 1
+        q, salt, sign = params.get("q", ""), params.get("salt", ""), params.get("sign", "")
+        if not q or not params.get("from") or not params.get("to") or params.get("appid") != self.app_id:
+            return self._error("54000", "PARAM_FROM_TO_OR_Q_EMPTY" if not q else "Invalid Access Limit")
+        expected = hashlib.md5((self.app_id + q + salt + self.secret_key).encode("utf-8")).hexdigest()
+        if sign != expected:
+            return self._error("54001", "Invalid Sign")
+        if self._throttled():
+            return self._error("54003", "Invalid Access Limit")
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if self.error_rate and random.random() < self.error_rate:
+            return self._error("52001", "TIMEOUT")
+        return {
+            "from": params["from"],
+            "to": params["to"],
+            "trans_result": [{"src": line, "dst": f"〔{params['to']}〕{line}"} for line in q.split("\n")]
+        }
+
+    def _error(self, code, message):
+        with self.lock:
+            self.stats[f"error_{code}"] += 1
+        return {"error_code": code, "error_msg": message}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 响应头和响应体分两次写出，关闭 Nagle 避免与客户端延迟 ACK 叠加出 40ms 等待
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, params):
+                body = json.dumps(server.handle(params), ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                self._reply({key: values[0] for key, values in query.items()})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                self._reply({key: values[0] for key, values in form.items()})
+
+        return Handler
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.mock_baidu", description="本地模拟百度翻译接口")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--app-id", default="bench-app")
+    parser.add_argument("--secret-key", default="bench-secret")
+    parser.add_argument("--latency", type=float, default=0.05, help="平均响应延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.02, help="延迟的随机波动（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回 52001 的比例")
+    parser.add_argument("--qps", type=float, default=None, help="QPS 上限，超出返回 54003")
+    args = parser.parse_args(argv)
+    server = MockBaiduServer(
+        args.app_id, args.secret_key, args.latency, args.jitter, args.error_rate, args.qps, args.host, args.port
+    )
+    print(f"模拟百度翻译接口：{server.url}（appid={args.app_id}）", flush=True)
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""性能基准：在本地模拟接口上测量翻译、多后端路由、分类、关键词、读写和用户库的吞吐与延迟
+
+用法：python -m benchmarks.run [--sizes 100,10000,100000] [--output results.json]
+结果写成 JSON（每项含 rows_per_sec 和 p95_ms），便于跨版本对比回归。
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from comment_translator import config
+from comment_translator.engine import get_translation_router, register_backend
+from comment_translator.export import EXPORT_FORMATS, RESULT_COLUMNS, ResultExporter
+from comment_translator.ingest import INGEST_CHUNK_SIZE, iter_comment_chunks
+from comment_translator.keywords import KeywordCounter, extract_negative_keywords
+from comment_translator.sentiment import classify_comment, classify_comments
+from comment_translator.translation import (
+    baidu_translate, baidu_translate_batch, get_translate_client, translate_multi_with_status
+)
+from comment_translator import users
+
+from .corpus import make_corpus
+from .mock_backend import MockBackend
+from .mock_baidu import MockBaiduServer
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# ========== 计时工具 ==========
+def percentile(samples, pct):
+    """最近秩法求分位数（毫秒）"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return round(ordered[rank] * 1000, 3)
+
+def summarize(name, size, rows, seconds, samples, **extra):
+    """一项基准的结果：吞吐和单次操作（批次/块/请求）的延迟分布"""
+    result = {
+        "benchmark": name,
+        "corpus_size": size,
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "rows_per_sec": round(rows / seconds, 1) if seconds else None,
+        "samples": len(samples),
+        "p50_ms": percentile(samples, 50),
+        "p95_ms": percentile(samples, 95),
+        "max_ms": round(max(samples) * 1000, 3) if samples else None
+    }
+    result.update(extra)
+    print(f"{name:<28} n={size:<7} {result['rows_per_sec'] or 0:>12,.1f} rows/s  p95={result['p95_ms']} ms", flush=True)
+    return result
+
+def timed_chunks(func, chunks):
+    """逐块调用 func，返回 (总耗时, 每块耗时)"""
+    samples = []
+    start = time.perf_counter()
+    for chunk in chunks:
+        t0 = time.perf_counter()
+        func(chunk)
+        samples.append(time.perf_counter() - t0)
+    return time.perf_counter() - start, samples
+
+def chunked(items, size=INGEST_CHUNK_SIZE):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+# ========== 旧版实现（对照基线） ==========
+LEGACY_POSITIVE_WORDS = ["good", "nice", "excellent", "perfect", "great", "love", "best", "satisfied", "recommend"]
+LEGACY_NEGATIVE_WORDS = ["bad", "terrible", "worse", "poor", "broken", "slow", "disappointed", "defective", "waste"]
+LEGACY_STOP_WORDS = ["the", "a", "an", "and", "or", "but", "is", "are", "was", "were", "i", "you", "it", "this", "that"]
+
+def legacy_classify_comment(text):
+    """优化前的逐行子串匹配分类"""
+    text_lower = text.lower()
+    pos_count = sum(1 for w in LEGACY_POSITIVE_WORDS if w in text_lower)
+    neg_count = sum(1 for w in LEGACY_NEGATIVE_WORDS if w in text_lower)
+    if pos_count > neg_count:
+        return "好评"
+    elif neg_count > pos_count:
+        return "差评"
+    return "中性"
+
+def legacy_extract_negative_keywords(bad_comments, top_n=5):
+    """优化前的差评关键词统计"""
+    all_words = []
+    for comment in bad_comments:
+        words = re.findall(r'\b[a-zA-Z]+\b', comment.lower())
+        all_words.extend([w for w in words if w not in LEGACY_STOP_WORDS and len(w) > 2])
+    return Counter(all_words).most_common(top_n)
+
+# ========== 各项基准 ==========
+def bench_translate(corpus, workdir, server):
+    """翻译：冷缓存、热缓存（同一数据再跑一遍）和单条接口；延迟按每次 HTTP 批次统计"""
+    results = []
+    size = len(corpus)
+    client = get_translate_client()
+    request_samples = []
+    translate_lines = client.translate_lines
+
+    def timed_translate_lines(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return translate_lines(*args, **kwargs)
+        finally:
+            request_samples.append(time.perf_counter() - t0)
+
+    client.translate_lines = timed_translate_lines
+    try:
+        # 每轮使用新的缓存文件，冷启动不受之前结果影响
+        config.configure(TRANSLATION_CACHE_FILE=os.path.join(workdir, f"cache-{size}.db"))
+        for name in ("translate_batch_cold", "translate_batch_warm"):
+            request_samples.clear()
+            server.stats.clear()
+            failed = 0
+            start = time.perf_counter()
+            for chunk in chunked(corpus):
+                failed += sum(1 for text in baidu_translate_batch(chunk) if text.startswith("翻译"))
+            seconds = time.perf_counter() - start
+            results.append(summarize(
+                name, size, size, seconds, list(request_samples),
+                http_requests=server.stats["requests"], failed_rows=failed,
+                server_errors={code: n for code, n in server.stats.items() if code.startswith("error_")}
+            ))
+
+        config.configure(TRANSLATION_CACHE_FILE=os.path.join(workdir, f"cache-{size}-single.db"))
+        sample = corpus[:100]
+        request_samples.clear()
+        server.stats.clear()
+        seconds, _ = timed_chunks(baidu_translate, sample)
+        results.append(summarize(
+            "translate_single", size, len(sample), seconds, list(request_samples),
+            http_requests=server.stats["requests"]
+        ))
+    finally:
+        del client.translate_lines
+    return results
+
+def bench_router(corpus, workdir, server, targets, backup_latency):
+    """多后端路由 + 多目标语言：百度（模拟接口）为主，限流（--server-qps 触发 54003）时切换到更贵的进程内备用后端，
+    各目标语言共用一次语言识别、缓存和并发批次；延迟按每块统计，backends 为路由器的累计观测
+    """
+    size = len(corpus)
+    backup = MockBackend("backup", latency=backup_latency, jitter=backup_latency / 2, cost_per_million_chars=200)
+    register_backend("backup", lambda: backup)
+    config.configure(
+        TRANSLATE_BACKENDS=["baidu", "backup"], TRANSLATION_CACHE_FILE=os.path.join(workdir, f"cache-{size}-router.db")
+    )
+    try:
+        server.stats.clear()
+        samples = []
+        failed = 0
+        start = time.perf_counter()
+        for chunk in chunked(corpus):
+            t0 = time.perf_counter()
+            statuses = translate_multi_with_status(chunk, targets)
+            samples.append(time.perf_counter() - t0)
+            failed += sum(1 for lang in targets for _, error in statuses[lang] if error)
+        seconds = time.perf_counter() - start
+        return [summarize(
+            "translate_multi_router", size, size, seconds, samples,
+            targets=list(targets), failed_translations=failed, http_requests=server.stats["requests"],
+            server_errors={code: n for code, n in server.stats.items() if code.startswith("error_")},
+            backup_requests=backup.stats["requests"], backends=get_translation_router().snapshot()
+        )]
+    finally:
+        config.configure(TRANSLATE_BACKENDS=["baidu"])
+
+def bench_classify(corpus):
+    size = len(corpus)
+    chunks = chunked(corpus)
+    results = []
+    seconds, samples = timed_chunks(classify_comments, chunks)
+    results.append(summarize("classify_vectorized", size, size, seconds, samples))
+    seconds, samples = timed_chunks(lambda chunk: [classify_comment(text) for text in chunk], chunks)
+    results.append(summarize("classify_comment", size, size, seconds, samples))
+    seconds, samples = timed_chunks(lambda chunk: [legacy_classify_comment(text) for text in chunk], chunks)
+    results.append(summarize("classify_legacy", size, size, seconds, samples))
+    return results
+
+def bench_keywords(corpus):
+    size = len(corpus)
+    categories = classify_comments(corpus)
+    bad = [text for text, category in zip(corpus, categories) if category == "差评"]
+    results = []
+    for name, func in (
+        ("keywords_extract", extract_negative_keywords),
+        ("keywords_legacy", legacy_extract_negative_keywords),
+    ):
+        seconds, samples = timed_chunks(func, [bad])
+        results.append(summarize(name, size, len(bad), seconds, samples))
+    counter = KeywordCounter()
+    seconds, samples = timed_chunks(counter.update, chunked(bad))
+    results.append(summarize("keywords_incremental_ngram", size, len(bad), seconds, samples))
+    return results
+
+def bench_ingest_export(corpus, workdir):
+    size = len(corpus)
+    results = []
+    frame = pd.DataFrame({"评论": corpus})
+    sources = {"csv": os.path.join(workdir, f"corpus-{size}.csv")}
+    frame.to_csv(sources["csv"], index=False, encoding="utf-8-sig")
+    # xlsx 写入很慢，10万行只测 CSV
+    if size <= 20000:
+        sources["xlsx"] = os.path.join(workdir, f"corpus-{size}.xlsx")
+        frame.to_excel(sources["xlsx"], index=False)
+    for fmt, path in sources.items():
+        samples = []
+        rows = 0
+        with open(path, "rb") as f:
+            source = io.BytesIO(f.read())
+        source.name = path
+        start = time.perf_counter()
+        t0 = start
+        for comments in iter_comment_chunks(source):
+            rows += len(comments)
+            samples.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+        results.append(summarize(f"ingest_{fmt}", size, rows, time.perf_counter() - start, samples))
+
+    result = pd.DataFrame({
+        "评论": corpus, "中文翻译": corpus, "评论分类": classify_comments(corpus).to_numpy(), "翻译状态": "成功"
+    }, columns=RESULT_COLUMNS)
+    chunks = [result.iloc[i:i + INGEST_CHUNK_SIZE] for i in range(0, size, INGEST_CHUNK_SIZE)]
+    for fmt in EXPORT_FORMATS:
+        exporter = ResultExporter(fmt, path=os.path.join(workdir, f"export-{size}.{fmt}"))
+        seconds, samples = timed_chunks(exporter.write_chunk, chunks)
+        t0 = time.perf_counter()
+        path = exporter.close()
+        seconds += time.perf_counter() - t0
+        results.append(summarize(f"export_{fmt}", size, size, seconds, samples, bytes=os.path.getsize(path)))
+    return results
+
+def bench_user_store(ops, workdir, threads=8):
+    """用户库：读会员状态、读用量、原子扣减额度（单线程和多线程争用）"""
+    config.configure(
+        USER_DB_FILE=os.path.join(workdir, "users.db"),
+        USER_DATA_FILE=os.path.join(workdir, "users.json"),
+        FREE_DAILY_LIMIT=10 ** 9
+    )
+    user_ids = [f"138{i:08d}" for i in range(100)]
+    for user_id in user_ids:
+        users.bind_user(user_id)
+    pick = lambda i: user_ids[i % len(user_ids)]
+    results = []
+    for name, func in (
+        ("user_check_vip_valid", lambda i: users.check_vip_valid(pick(i))),
+        ("user_get_free_usage", lambda i: users.get_free_user_usage(pick(i))),
+        ("user_consume_quota", lambda i: users.consume_free_quota(pick(i), 1)),
+    ):
+        seconds, samples = timed_chunks(func, range(ops))
+        results.append(summarize(name, ops, ops, seconds, samples))
+
+    samples = []
+    lock = threading.Lock()
+
+    def contended(i):
+        t0 = time.perf_counter()
+        users.consume_free_quota(pick(i), 1)
+        with lock:
+            samples.append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(contended, range(ops)))
+    results.append(summarize(
+        "user_consume_quota_threads", ops, ops, time.perf_counter() - start, samples, threads=threads
+    ))
+    return results
+
+# ========== 入口 ==========
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(RESULTS_DIR)
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="评论翻译性能基准")
+    parser.add_argument("--sizes", default="100,10000,100000", help="语料行数，逗号分隔")
+    parser.add_argument("--duplicate-rate", type=float, default=0.35, help="重复评论比例")
+    parser.add_argument("--only", default="translate,router,classify,keywords,io,users", help="要运行的基准，逗号分隔")
+    parser.add_argument("--latency", type=float, default=0.02, help="模拟接口平均延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.01, help="模拟接口延迟波动（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="模拟接口随机错误率")
+    parser.add_argument("--server-qps", type=float, default=None, help="模拟接口的 QPS 上限（超出返回 54003）")
+    parser.add_argument("--qps", type=float, default=100, help="客户端限流 QPS")
+    parser.add_argument("--workers", type=int, default=config.TRANSLATE_WORKERS, help="并发请求线程数")
+    parser.add_argument("--targets", default="zh,jp", help="多目标语言基准的目标语言，逗号分隔")
+    parser.add_argument("--backup-latency", type=float, default=0.05, help="备用模拟后端的平均延迟（秒）")
+    parser.add_argument("--user-ops", type=int, default=1000, help="用户库每项操作次数")
+    parser.add_argument("-o", "--output", help="结果 JSON 路径（默认 benchmarks/results/<时间>.json）")
+    args = parser.parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    only = set(args.only.split(","))
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="comment-bench-") as workdir, MockBaiduServer(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, qps=args.server_qps
+    ) as server:
+        config.configure(
+            APP_ID=server.app_id, SECRET_KEY=server.secret_key, BAIDU_API_URL=server.url,
+            TRANSLATE_QPS=args.qps, TRANSLATE_WORKERS=args.workers,
+            CHECKPOINT_FILE=os.path.join(workdir, "checkpoints.db")
+        )
+        for size in sizes:
+            corpus = make_corpus(size, args.duplicate_rate)
+            if "translate" in only:
+                results += bench_translate(corpus, workdir, server)
+            if "router" in only:
+                results += bench_router(corpus, workdir, server, config.parse_list(args.targets), args.backup_latency)
+            if "classify" in only:
+                results += bench_classify(corpus)
+            if "keywords" in only:
+                results += bench_keywords(corpus)
+            if "io" in only:
+                results += bench_ingest_export(corpus, workdir)
+        if "users" in only:
+            results += bench_user_store(args.user_ops, workdir)
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": vars(args),
+        "results": results
+    }
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""跨境电商评论翻译核心流水线（不依赖 Streamlit，可在脚本和命令行中直接使用）
+
+子模块按需导入，import 本包本身不会加载 pandas/openpyxl/requests。
+"""
+import importlib
+
+from .config import configure
+
+# 对外接口 -> 所在子模块（首次访问时才导入）
+_LAZY_EXPORTS = {
+    "baidu_translate": "translation",
+    "baidu_translate_batch": "translation",
+    "translate_multi_with_status": "translation",
+    "TranslationBackend": "engine",
+    "register_backend": "engine",
+    "classify_comment": "sentiment",
+    "classify_comments": "sentiment",
+    "detect_language": "language",
+    "extract_negative_keywords": "keywords",
+    "KeywordCounter": "keywords",
+    "iter_comment_chunks": "ingest",
+    "ResultExporter": "export",
+    "process_comment_chunk": "pipeline",
+    "process_file": "pipeline",
+}
+
+__all__ = ["configure", *_LAZY_EXPORTS]
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(f".{_LAZY_EXPORTS[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
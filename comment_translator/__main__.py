@@ -0,0 +1,70 @@
+"""命令行批处理：python -m comment_translator <输入目录> [-o 输出目录]
+
+凭证从环境变量 BAIDU_APP_ID / BAIDU_SECRET_KEY 读取，多个文件分进程并行处理。
+每块结果都记入断点日志，中断后重新运行同一命令会从断点继续；--retry-failed 只重试失败的行。
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import config
+
+def _init_worker(settings):
+    """子进程沿用主进程的配置"""
+    config.configure(**settings)
+
+def _run_file(path, output_dir, fmt, retry_failed, profile):
+    # 重依赖（pandas/openpyxl/requests）只在真正处理文件时才导入
+    from .pipeline import process_file
+    try:
+        return process_file(path, output_dir, fmt, retry_failed=retry_failed, profile=profile)
+    except Exception as e:
+        return {"file": path, "error": str(e)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m comment_translator", description="批量翻译并分类目录下的CSV/XLSX评论文件")
+    parser.add_argument("input_dir", help="待处理文件所在目录")
+    parser.add_argument("-o", "--output-dir", help="结果输出目录（默认：<输入目录>/output）")
+    parser.add_argument("-f", "--format", default="xlsx", choices=["xlsx", "csv", "parquet"], help="导出格式")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="并行处理的文件数")
+    parser.add_argument("--retry-failed", action="store_true", help="只重新翻译上次运行中失败的行（其余行取断点记录）")
+    parser.add_argument("--profile", action="store_true", help="用 cProfile 分析每个文件的处理，统计文件写到输出目录")
+    parser.add_argument("--targets", help="除中文外的目标语言（百度语言代码，逗号分隔，如 en,jp），每种语言多一列译文")
+    parser.add_argument("--backends", help="启用的翻译后端（逗号分隔，默认取环境变量 TRANSLATE_BACKENDS）")
+    args = parser.parse_args(argv)
+
+    if not config.APP_ID or not config.SECRET_KEY:
+        parser.error("请先设置环境变量 BAIDU_APP_ID 和 BAIDU_SECRET_KEY")
+    files = sorted(
+        path for pattern in ("*.csv", "*.xlsx") for path in glob.glob(os.path.join(args.input_dir, pattern))
+    )
+    if not files:
+        parser.error(f"{args.input_dir} 下没有CSV/XLSX文件")
+    output_dir = args.output_dir or os.path.join(args.input_dir, "output")
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = max(1, min(args.jobs, len(files)))
+    # 每个进程各自限流，QPS平分以免总速率超出套餐上限
+    settings = {
+        name: getattr(config, name) for name in dir(config) if name.isupper()
+    }
+    settings["TRANSLATE_QPS"] = config.TRANSLATE_QPS / jobs
+    if args.targets is not None:
+        settings["EXTRA_TARGET_LANGS"] = config.parse_list(args.targets)
+    if args.backends is not None:
+        settings["TRANSLATE_BACKENDS"] = config.parse_list(args.backends)
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(settings,)) as pool:
+        futures = [pool.submit(_run_file, path, output_dir, args.format, args.retry_failed, args.profile) for path in files]
+        for future in as_completed(futures):
+            summary = future.result()
+            failed += "error" in summary or summary.get("failed", 0) > 0
+            print(json.dumps(summary, ensure_ascii=False), flush=True)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
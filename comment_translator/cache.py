@@ -0,0 +1,104 @@
+"""译文缓存（翻译记忆库）"""
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from . import config
+
+class TranslationCache:
+    """译文持久化缓存：SQLite存储 + 进程内LRU，按原文哈希和语言对索引"""
+    def __init__(self, path, max_entries=None, ttl_days=None, memory_size=None):
+        self.max_entries = config.CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl_seconds = (config.CACHE_TTL_DAYS if ttl_days is None else ttl_days) * 86400
+        self.memory_size = config.CACHE_MEMORY_SIZE if memory_size is None else memory_size
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "key TEXT PRIMARY KEY, dst TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_accessed ON translations (accessed_at)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(text, from_lang, to_lang):
+        return hashlib.sha1(f"{from_lang}|{to_lang}|{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key, dst, created_at):
+        self.memory[key] = (dst, created_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def get_many(self, texts, from_lang, to_lang):
+        """批量查询，返回 {原文: 译文}（只含命中项）"""
+        now = time.time()
+        found, pending = {}, {}
+        with self.lock:
+            for text in texts:
+                key = self.make_key(text, from_lang, to_lang)
+                entry = self.memory.get(key)
+                if entry and now - entry[1] < self.ttl_seconds:
+                    self.memory.move_to_end(key)
+                    found[text] = entry[0]
+                else:
+                    pending[key] = text
+            keys = list(pending)
+            # 分段查询，避免超出SQLite参数个数上限
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, dst, created_at FROM translations WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, dst, created_at in rows:
+                    if now - created_at < self.ttl_seconds:
+                        found[pending[key]] = dst
+                        self._remember(key, dst, created_at)
+            hit_keys = [key for key, text in pending.items() if text in found]
+            if hit_keys:
+                self.conn.executemany("UPDATE translations SET accessed_at = ? WHERE key = ?", [(now, key) for key in hit_keys])
+                self.conn.commit()
+            self.hits += len(found)
+            self.misses += len(texts) - len(found)
+        return found
+
+    def put_many(self, pairs, from_lang, to_lang):
+        """批量写入 {原文: 译文}，并按TTL和条数上限淘汰旧记录"""
+        if not pairs:
+            return
+        now = time.time()
+        with self.lock:
+            rows = []
+            for text, dst in pairs.items():
+                key = self.make_key(text, from_lang, to_lang)
+                rows.append((key, dst, now, now))
+                self._remember(key, dst, now)
+            self.conn.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)", rows)
+            self.conn.execute("DELETE FROM translations WHERE created_at < ?", (now - self.ttl_seconds,))
+            overflow = self.conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self.conn.execute(
+                    "DELETE FROM translations WHERE key IN (SELECT key FROM translations ORDER BY accessed_at LIMIT ?)",
+                    (overflow,)
+                )
+            self.conn.commit()
+
+    def stats(self):
+        """命中统计"""
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+def get_translation_cache():
+    """进程内共享的译文缓存（所有会话共用）"""
+    return _open_translation_cache(config.TRANSLATION_CACHE_FILE)
+
+@lru_cache(maxsize=None)
+def _open_translation_cache(path):
+    return TranslationCache(path)
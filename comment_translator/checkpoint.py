@@ -0,0 +1,111 @@
+"""任务断点日志：每处理完一块就把行结果写入 SQLite，中断后可从断点继续、只重试失败行"""
+import json
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+from . import config
+
+# 切换 WAL 撞锁时的重试次数和间隔（秒）
+WAL_RETRIES = 50
+WAL_RETRY_DELAY = 0.1
+
+class CheckpointStore:
+    """按任务记录已完成行（行号、译文、分类、状态、错误码、额外目标语言的译文）"""
+    def __init__(self, path, ttl_days=None):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        # 多个进程同时打开新库时，切换 WAL 会直接报 database is locked（不等 busy 超时），稍后重试
+        for attempt in range(WAL_RETRIES):
+            try:
+                self.conn.execute("PRAGMA journal_mode=WAL")
+                break
+            except sqlite3.OperationalError:
+                if attempt == WAL_RETRIES - 1:
+                    raise
+                time.sleep(WAL_RETRY_DELAY)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, file_name TEXT, total INTEGER, status TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_rows ("
+            "job_id TEXT NOT NULL, row_idx INTEGER NOT NULL, comment TEXT, translation TEXT, category TEXT, "
+            "status TEXT NOT NULL, error_code TEXT, extras TEXT, PRIMARY KEY (job_id, row_idx))"
+        )
+        # 旧版断点日志没有额外译文列（JSON：{列名: 译文}）
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(job_rows)")]
+        if "extras" not in columns:
+            try:
+                self.conn.execute("ALTER TABLE job_rows ADD COLUMN extras TEXT")
+            except sqlite3.OperationalError as e:
+                # 多个进程同时升级旧库时，其他进程可能已经加上了这一列
+                if "duplicate column" not in str(e):
+                    raise
+        # 清理过期任务
+        ttl_days = config.CHECKPOINT_TTL_DAYS if ttl_days is None else ttl_days
+        expire_before = time.time() - ttl_days * 86400
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM job_rows WHERE job_id IN (SELECT job_id FROM jobs WHERE updated_at < ?)", (expire_before,)
+            )
+            self.conn.execute("DELETE FROM jobs WHERE updated_at < ?", (expire_before,))
+
+    def start_job(self, job_id, file_name, total):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO jobs VALUES (?, ?, ?, 'running', ?) "
+                "ON CONFLICT(job_id) DO UPDATE SET status = 'running', total = excluded.total, updated_at = excluded.updated_at",
+                (job_id, file_name, total, time.time())
+            )
+
+    def finish_job(self, job_id, status="done"):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?", (status, time.time(), job_id))
+
+    def save_rows(self, job_id, row_indices, df, errors):
+        """写入一块的结果（同一事务内，作为一个断点）；前四列为固定结果列，其后的列记入 extras"""
+        extra_columns = list(df.columns[4:])
+        rows = [
+            (
+                job_id, row_idx, *values[:4], error["code"] if error else None,
+                json.dumps(dict(zip(extra_columns, values[4:])), ensure_ascii=False) if extra_columns else None
+            )
+            for row_idx, values, error in zip(row_indices, df.itertuples(index=False, name=None), errors)
+        ]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO job_rows "
+                "(job_id, row_idx, comment, translation, category, status, error_code, extras) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self.conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (time.time(), job_id))
+
+    def load_rows(self, job_id, failed_only=False, extra_columns=()):
+        """读取已记录的行，返回 {行号: (评论, 译文, 分类, 状态, *extra_columns 各列的译文)}"""
+        sql = "SELECT row_idx, comment, translation, category, status, extras FROM job_rows WHERE job_id = ?"
+        if failed_only:
+            sql += " AND error_code IS NOT NULL"
+        with self.lock:
+            rows = self.conn.execute(sql + " ORDER BY row_idx", (job_id,)).fetchall()
+        result = {}
+        for row in rows:
+            extras = json.loads(row[5]) if extra_columns and row[5] else {}
+            result[row[0]] = (*row[1:5], *(extras.get(column, "") for column in extra_columns))
+        return result
+
+    def count_rows(self, job_id):
+        """已记录的行数和其中失败的行数"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*), COUNT(error_code) FROM job_rows WHERE job_id = ?", (job_id,)
+            ).fetchone()
+
+def get_checkpoint_store():
+    """进程内共享的断点日志"""
+    return _open_checkpoint_store(config.CHECKPOINT_FILE)
+
+@lru_cache(maxsize=None)
+def _open_checkpoint_store(path):
+    return CheckpointStore(path)
@@ -0,0 +1,63 @@
+"""运行配置：默认从环境变量读取，Streamlit 页面启动时再用 st.secrets 覆盖"""
+import os
+
+def parse_list(value):
+    """逗号分隔的配置值转成列表（已是列表/元组时原样返回）"""
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [item.strip() for item in str(value or "").split(",") if item.strip()]
+
+# 百度翻译 API 配置
+APP_ID = os.environ.get("BAIDU_APP_ID", "")
+SECRET_KEY = os.environ.get("BAIDU_SECRET_KEY", "")
+# 接口地址可改为本地模拟服务（测试、压测用）
+BAIDU_API_URL = os.environ.get("BAIDU_API_URL", "https://fanyi-api.baidu.com/api/trans/vip/translate")
+# HTTP连接池：连接数、连接/读取超时（秒）、是否请求压缩响应
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 10))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 3.05))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 10))
+HTTP_COMPRESSION = os.environ.get("HTTP_COMPRESSION", "1") != "0"
+# 百度套餐的QPS上限（标准版1，高级版10）及并发线程数
+TRANSLATE_QPS = float(os.environ.get("BAIDU_QPS", 1))
+TRANSLATE_WORKERS = int(os.environ.get("TRANSLATE_WORKERS", 4))
+# 百度每日字符额度（0 为不限，额度将尽时路由优先用其他后端）和每百万字符费用（元）
+BAIDU_DAILY_CHAR_QUOTA = int(os.environ.get("BAIDU_DAILY_CHAR_QUOTA", 0))
+BAIDU_COST_PER_MILLION_CHARS = float(os.environ.get("BAIDU_COST_PER_MILLION_CHARS", 49))
+
+# ========== 翻译后端与目标语言 ==========
+# 启用的翻译后端（按名称，见 engine.register_backend；多个后端时按延迟、错误率、额度和费用路由）
+TRANSLATE_BACKENDS = parse_list(os.environ.get("TRANSLATE_BACKENDS", "baidu"))
+# 后端出错（限流、超时等）后暂停使用的秒数；每元费用折算成多少秒耗时参与路由
+ROUTER_COOLDOWN = float(os.environ.get("ROUTER_COOLDOWN", 10))
+ROUTER_COST_WEIGHT = float(os.environ.get("ROUTER_COST_WEIGHT", 1))
+# 除中文外的目标语言（百度语言代码，如 en,jp），每种语言在结果表中多一列「译文_<代码>」
+EXTRA_TARGET_LANGS = parse_list(os.environ.get("EXTRA_TARGET_LANGS", ""))
+
+# ========== 本地数据持久化 ==========
+# 旧版JSON用户数据（首次启动时自动迁移到SQLite）
+USER_DATA_FILE = "vip_users.json"
+USER_DB_FILE = "vip_users.db"
+# 用户记录的进程内缓存时长（秒），本进程写入时立即失效
+USER_CACHE_TTL = 5
+# 译文缓存（翻译记忆库），与用户数据放在同一目录
+TRANSLATION_CACHE_FILE = "translation_cache.db"
+CACHE_MAX_ENTRIES = 200000
+CACHE_TTL_DAYS = 90
+CACHE_MEMORY_SIZE = 5000
+# 批量任务断点日志（中断后从断点继续）
+CHECKPOINT_FILE = "job_checkpoints.db"
+CHECKPOINT_TTL_DAYS = 7
+# 免费用户每日额度
+FREE_DAILY_LIMIT = 50
+
+# ========== 运行指标 ==========
+# 本地 Prometheus 指标端口（0 为不开启）；JSONL 指标日志路径（为空不记录）
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+METRICS_LOG_FILE = os.environ.get("METRICS_LOG_FILE", "")
+
+def configure(**settings):
+    """覆盖配置项（只接受本模块已有的大写配置名）"""
+    for name, value in settings.items():
+        if not name.isupper() or name not in globals():
+            raise KeyError(f"未知配置项：{name}")
+        globals()[name] = value
@@ -0,0 +1,171 @@
+"""翻译引擎：可插拔的翻译后端接口，以及按延迟、错误率、剩余额度和费用在多个后端间分发批次的路由器
+
+后端按名称注册（register_backend），config.TRANSLATE_BACKENDS 决定启用哪些；百度为内置后端。
+"""
+import threading
+import time
+from datetime import date
+from functools import lru_cache
+
+from . import config, metrics
+
+# 有其他后端可切换时，单个后端内部只重试一次，尽快换后端
+FAILOVER_MAX_RETRIES = 1
+# 平滑延迟和错误率的权重（越大越看重最近的请求）
+EWMA_ALPHA = 0.2
+# 还没有观测数据的后端按此延迟（秒）估算，新后端会先被试用
+DEFAULT_LATENCY = 0.5
+# 错误率对预估耗时的放大系数（失败的批次要换后端重发）
+ERROR_PENALTY = 4
+
+class TranslationBackend:
+    """翻译后端接口
+
+    translate_lines 发送一个批次（逐行），返回 (逐行译文, 结构化错误)：整批失败时译文为 None，
+    部分行缺失时对应位置为 None 且错误为 missing。语言代码统一用百度语言代码，其他后端自行转换。
+    """
+    name = "backend"
+    # 每百万字符费用（元）和每日字符额度（0 为不限），路由时参考
+    cost_per_million_chars = 0.0
+    daily_char_quota = 0
+
+    def supports(self, from_lang, to_lang):
+        """是否支持该语言方向（不支持的后端不参与路由）"""
+        return True
+
+    def translate_lines(self, lines, from_lang="en", to_lang="zh"):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+def _baidu_backend():
+    from .translation import get_translate_client
+    return get_translate_client(max_retries=FAILOVER_MAX_RETRIES if len(config.TRANSLATE_BACKENDS) > 1 else None)
+
+# 后端名称 -> 无参工厂函数（返回进程内共享的后端实例）
+BACKEND_FACTORIES = {"baidu": _baidu_backend}
+
+def register_backend(name, factory):
+    """注册一个翻译后端（factory 无参，返回 TranslationBackend；每次取用都会调用，应自行复用实例）"""
+    BACKEND_FACTORIES[name] = factory
+
+class BackendState:
+    """路由器对一个后端的观测：平滑延迟、平滑错误率、当日已用字符、冷却截止时间"""
+    def __init__(self):
+        self.latency = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.day = date.today()
+        self.chars_today = 0
+        self.cooldown_until = 0.0
+
+class TranslationRouter:
+    """把批次发给预估代价最低的可用后端；后端出错（限流、超时等）时冷却一段时间并换下一个后端重发
+
+    额度按进程内当日已成功翻译的字符数估算（重启后从零开始）。
+    """
+    def __init__(self, names):
+        self.names = list(names)
+        self.states = {name: BackendState() for name in self.names}
+        self.lock = threading.Lock()
+
+    def backends(self):
+        """当前启用的后端实例（按名称调用工厂，配置变化时拿到新实例）"""
+        unknown = [name for name in self.names if name not in BACKEND_FACTORIES]
+        if unknown:
+            raise ValueError(f"未注册的翻译后端：{', '.join(unknown)}")
+        return [BACKEND_FACTORIES[name]() for name in self.names]
+
+    def _state(self, backend):
+        state = self.states.setdefault(backend.name, BackendState())
+        if state.day != date.today():
+            state.day, state.chars_today = date.today(), 0
+        return state
+
+    def remaining_quota(self, backend):
+        """当日剩余额度的比例（不限额度时为 1）"""
+        if not backend.daily_char_quota:
+            return 1.0
+        return max(0.0, 1 - self._state(backend).chars_today / backend.daily_char_quota)
+
+    def estimate(self, backend, chars):
+        """预估一个批次的代价（秒）：平滑延迟按错误率放大，加上费用折算，再按剩余额度比例放大"""
+        state = self._state(backend)
+        latency = DEFAULT_LATENCY if state.latency is None else state.latency
+        cost = backend.cost_per_million_chars * chars / 1e6 * config.ROUTER_COST_WEIGHT
+        return (latency * (1 + ERROR_PENALTY * state.error_rate) + cost) / max(self.remaining_quota(backend), 0.01)
+
+    def ranked(self, lines, from_lang, to_lang):
+        """按预估代价排好序的候选后端：冷却中的排在可用后端之后（都在冷却时仍会尝试），额度用尽的不参与"""
+        chars = sum(len(line) for line in lines)
+        now = time.monotonic()
+        with self.lock:
+            candidates = [
+                backend for backend in self.backends()
+                if backend.supports(from_lang, to_lang) and self.remaining_quota(backend) > 0
+            ]
+            return sorted(candidates, key=lambda backend: (
+                self._state(backend).cooldown_until > now, self.estimate(backend, chars)
+            ))
+
+    def record(self, backend, seconds, chars, error):
+        """记录一次请求的结果（error 为 None 或 missing 时视为成功）"""
+        failed = error is not None and error["code"] != "missing"
+        with self.lock:
+            state = self._state(backend)
+            state.latency = seconds if state.latency is None else state.latency + EWMA_ALPHA * (seconds - state.latency)
+            state.error_rate += EWMA_ALPHA * ((1.0 if failed else 0.0) - state.error_rate)
+            state.requests += 1
+            if failed:
+                state.failures += 1
+                state.cooldown_until = time.monotonic() + config.ROUTER_COOLDOWN
+            else:
+                state.chars_today += chars
+        metrics.observe("backend_request_seconds", seconds, backend=backend.name)
+        metrics.inc("backend_requests_total", backend=backend.name, result=error["code"] if failed else "ok")
+
+    def translate_lines(self, lines, from_lang="en", to_lang="zh"):
+        """按代价依次尝试候选后端，第一个返回译文的结果即为结果；全部失败时返回最后一个错误"""
+        result = (None, {"code": "unavailable", "message": f"没有可用的翻译后端（{from_lang}→{to_lang}）"})
+        chars = sum(len(line) for line in lines)
+        for backend in self.ranked(lines, from_lang, to_lang):
+            started = time.perf_counter()
+            try:
+                translations, error = backend.translate_lines(lines, from_lang, to_lang)
+            except Exception as e:
+                translations, error = None, {"code": "exception", "message": str(e)}
+            self.record(backend, time.perf_counter() - started, chars, error)
+            if translations is not None:
+                return translations, error
+            result = (None, error)
+        return result
+
+    def snapshot(self):
+        """各后端的当前观测（管理员面板展示用）"""
+        now = time.monotonic()
+        rows = []
+        with self.lock:
+            for backend in self.backends():
+                state = self._state(backend)
+                rows.append({
+                    "backend": backend.name,
+                    "latency_ms": None if state.latency is None else round(state.latency * 1000, 1),
+                    "error_rate": round(state.error_rate, 3),
+                    "requests": state.requests,
+                    "failures": state.failures,
+                    "chars_today": state.chars_today,
+                    "daily_char_quota": backend.daily_char_quota,
+                    "cooling": state.cooldown_until > now,
+                    "estimate_s": round(self.estimate(backend, 1000), 3)
+                })
+        return rows
+
+def get_translation_router():
+    """进程内共享的路由器（启用的后端列表变化时新建）"""
+    return _create_router(tuple(config.TRANSLATE_BACKENDS))
+
+@lru_cache(maxsize=4)
+def _create_router(names):
+    return TranslationRouter(names)
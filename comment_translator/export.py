@@ -0,0 +1,102 @@
+"""结果流式导出（xlsx只写模式/csv/parquet）"""
+import csv
+import importlib.util
+import os
+import tempfile
+import time
+
+import pandas as pd
+from openpyxl import Workbook
+
+# 导出文件写到临时目录，按块追加，不在内存中拼整个工作簿
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "comment_exports")
+EXPORT_TTL_HOURS = 24
+EXPORT_MIME = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet"
+}
+# 结果表的列（评论原文、译文、情感分类、翻译状态）
+RESULT_COLUMNS = ["评论", "中文翻译", "评论分类", "翻译状态"]
+# 额外目标语言的译文列「译文_<语言代码>」，排在固定结果列之后
+TARGET_COLUMN_PREFIX = "译文_"
+# Parquet 依赖 pyarrow，未安装时不提供该格式
+EXPORT_FORMATS = [fmt for fmt in EXPORT_MIME if fmt != "parquet" or importlib.util.find_spec("pyarrow")]
+# 结果表的列类型：文本列用 pyarrow 字符串（未安装时用 pandas 字符串），情感分类用固定的三个类别
+TEXT_DTYPE = "string[pyarrow]" if importlib.util.find_spec("pyarrow") else "string"
+CATEGORY_DTYPE = pd.CategoricalDtype(["好评", "中性", "差评"])
+RESULT_DTYPES = {"评论": TEXT_DTYPE, "中文翻译": TEXT_DTYPE, "评论分类": CATEGORY_DTYPE, "翻译状态": TEXT_DTYPE}
+
+def result_columns(extra_targets=()):
+    """结果表的列：固定结果列 + 每种额外目标语言一列译文"""
+    return RESULT_COLUMNS + [TARGET_COLUMN_PREFIX + lang for lang in extra_targets]
+
+def compact_result_frame(df):
+    """结果表转为紧凑列类型（只保留结果列和译文列；缺失的文本记为空字符串，导出和断点日志里不出现 NA）"""
+    columns = RESULT_COLUMNS + [column for column in df.columns if str(column).startswith(TARGET_COLUMN_PREFIX)]
+    dtypes = {column: RESULT_DTYPES.get(column, TEXT_DTYPE) for column in columns}
+    df = df[columns]
+    text_columns = {column: df[column].fillna("").astype(str) for column in columns if dtypes[column] is TEXT_DTYPE}
+    return df.assign(**text_columns).astype(dtypes)
+
+def empty_result_frame(extra_targets=()):
+    return compact_result_frame(pd.DataFrame(columns=result_columns(extra_targets)))
+
+def _cleanup_exports():
+    """删除过期的导出文件"""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    expire_before = time.time() - EXPORT_TTL_HOURS * 3600
+    for name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, name)
+        if os.path.getmtime(path) < expire_before:
+            os.remove(path)
+
+class ResultExporter:
+    """结果导出器：每处理完一块就追加写入文件（xlsx只写模式/csv/parquet）"""
+    def __init__(self, fmt="xlsx", path=None):
+        # 未指定路径时写到临时导出目录（供页面下载）
+        if path is None:
+            _cleanup_exports()
+            fd, path = tempfile.mkstemp(suffix=f".{fmt}", dir=EXPORT_DIR)
+            os.close(fd)
+        self.path = path
+        self.fmt = fmt
+        self.columns = None
+        self.workbook = self.sheet = self.file = self.writer = None
+
+    def write_chunk(self, df):
+        if self.columns is None:
+            self.columns = list(df.columns)
+            if self.fmt == "xlsx":
+                self.workbook = Workbook(write_only=True)
+                self.sheet = self.workbook.create_sheet()
+                self.sheet.append(self.columns)
+            elif self.fmt == "csv":
+                # utf-8-sig 让Excel直接打开不乱码
+                self.file = open(self.path, "w", encoding="utf-8-sig", newline="")
+                self.writer = csv.writer(self.file)
+                self.writer.writerow(self.columns)
+        if self.fmt == "xlsx":
+            for row in df.itertuples(index=False):
+                self.sheet.append(list(row))
+        elif self.fmt == "csv":
+            self.writer.writerows(df.itertuples(index=False))
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema)
+            self.writer.write_table(table)
+
+    def close(self, columns=None):
+        """写完收尾，返回文件路径（没有任何数据时只写表头）"""
+        if self.columns is None:
+            self.write_chunk(empty_result_frame() if columns is None else compact_result_frame(pd.DataFrame(columns=columns)))
+        if self.fmt == "xlsx":
+            self.workbook.save(self.path)
+        elif self.fmt == "csv":
+            self.file.close()
+        elif self.writer is not None:
+            self.writer.close()
+        return self.path
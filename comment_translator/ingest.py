@@ -0,0 +1,63 @@
+"""上传文件的流式读取（只取「评论」列，按块产出）"""
+import pandas as pd
+from openpyxl import load_workbook
+
+COMMENT_COLUMN = "评论"
+# 每块处理的评论条数（控制峰值内存）
+INGEST_CHUNK_SIZE = 500
+
+def _iter_xlsx_comments(uploaded_file):
+    """只读模式逐行遍历xlsx，只取「评论」列"""
+    uploaded_file.seek(0)
+    workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, ())
+        if COMMENT_COLUMN not in header:
+            return
+        col = header.index(COMMENT_COLUMN)
+        for row in rows:
+            value = row[col] if col < len(row) else None
+            if value is not None and str(value).strip():
+                yield str(value)
+    finally:
+        workbook.close()
+
+def _iter_csv_comments(uploaded_file, chunk_size):
+    """分块读取csv，只解析「评论」列（与xlsx一致，跳过空值和只含空白的单元格）"""
+    uploaded_file.seek(0)
+    for chunk in pd.read_csv(uploaded_file, usecols=[COMMENT_COLUMN], dtype=str, chunksize=chunk_size):
+        comments = chunk[COMMENT_COLUMN].dropna()
+        yield from comments[comments.str.strip() != ""].tolist()
+
+def has_comment_column(uploaded_file):
+    """只读表头，检查是否有「评论」列"""
+    uploaded_file.seek(0)
+    if uploaded_file.name.endswith(".xlsx"):
+        workbook = load_workbook(uploaded_file, read_only=True)
+        try:
+            header = next(workbook.active.iter_rows(max_row=1, values_only=True), ())
+        finally:
+            workbook.close()
+    else:
+        header = pd.read_csv(uploaded_file, nrows=0).columns
+    return COMMENT_COLUMN in header
+
+def iter_comment_chunks(uploaded_file, chunk_size=INGEST_CHUNK_SIZE):
+    """流式读取上传文件中的评论（跳过空值），按块产出评论列表"""
+    if uploaded_file.name.endswith(".xlsx"):
+        comments = _iter_xlsx_comments(uploaded_file)
+    else:
+        comments = _iter_csv_comments(uploaded_file, chunk_size)
+    chunk = []
+    for comment in comments:
+        chunk.append(comment)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def count_comments(uploaded_file):
+    """流式统计评论条数（用于额度校验，不保留数据）"""
+    return sum(len(chunk) for chunk in iter_comment_chunks(uploaded_file))
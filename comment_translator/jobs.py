@@ -0,0 +1,233 @@
+"""后台翻译任务：在线程里分块处理上传文件，页面随时读取进度和已完成的结果
+
+每块结果都写入断点日志，任务中断（超时、刷新、重启）后用同一个任务标识重新运行会从断点继续，
+也可以只重试翻译失败的行。
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import Counter
+
+import pandas as pd
+
+from . import metrics
+from .checkpoint import get_checkpoint_store
+from .export import RESULT_COLUMNS, ResultExporter, compact_result_frame, empty_result_frame, result_columns
+from .ingest import INGEST_CHUNK_SIZE, iter_comment_chunks
+from .keywords import KeywordCounter
+from .pipeline import STATUS_OK, process_comment_chunk_with_status, resolve_extra_targets
+
+def _key_prefix(owner, extra_targets):
+    # 额外目标语言不同时结果列不同，分开记录断点（没有额外目标语言时与旧的任务标识一致）
+    prefix = owner.encode("utf-8") + b"\0"
+    if extra_targets:
+        prefix += ",".join(extra_targets).encode("utf-8") + b"\0"
+    return prefix
+
+def job_key(data, owner="", extra_targets=()):
+    """按文件内容（和所属用户、额外目标语言）生成任务标识，同一用户重复上传同一文件得到同一个任务"""
+    return hashlib.sha256(_key_prefix(owner, extra_targets) + data).hexdigest()
+
+def file_job_key(path, owner="", extra_targets=()):
+    """同 job_key，但分块读取本地文件计算，不把整个文件读进内存"""
+    digest = hashlib.sha256(_key_prefix(owner, extra_targets))
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class TranslationJob:
+    """一个文件的翻译任务；线程安全地暴露进度、结果、关键词和导出文件
+
+    data 为上传文件的内容（bytes）或本地文件路径；给定 profile_path 时用 cProfile 分析这一次运行；
+    extra_targets 为除中文外的目标语言（默认取配置），每种语言在结果表中多一列译文
+    """
+    def __init__(self, job_id, data, file_name, total=None, fmt="xlsx", chunk_size=INGEST_CHUNK_SIZE,
+                 export_path=None, keep_results=True, profile_path=None, extra_targets=None):
+        self.job_id = job_id
+        self.file_name = file_name
+        self.total = total
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+        # 命令行批处理时结果直接写到输出文件，不在内存里保留
+        self.export_path = export_path
+        self.keep_results = keep_results
+        self.profile_path = profile_path
+        self.extra_targets = resolve_extra_targets(extra_targets)
+        self.columns = result_columns(self.extra_targets)
+        # 性能分析结果 {"text": 报告, "path": .prof 文件}
+        self.profile = None
+        self.status = "pending"
+        self.error = None
+        self.lock = threading.Lock()
+        self.store = get_checkpoint_store()
+        self._data = data
+        self._thread = None
+        self._reset()
+
+    def _reset(self):
+        self.done = 0
+        self.failed = 0
+        self.resumed = 0
+        self.chunks = []
+        # 已拼接好的结果表（展示和导出共用），有新块时失效
+        self._frame = None
+        self.keywords = KeywordCounter()
+        self.category_counts = Counter()
+        self.exports = {}
+
+    def start(self, retry_failed=False):
+        """在后台线程中运行"""
+        self.status = "running"
+        self._thread = threading.Thread(
+            target=self.run, args=(retry_failed,), name=f"translate-{self.job_id[:8]}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def retry_failed(self):
+        """只重新翻译失败的行（成功的行直接取断点记录，不重复扣减额度）"""
+        with self.lock:
+            self._reset()
+        return self.start(retry_failed=True)
+
+    def run(self, retry_failed=False):
+        """同步运行：已记录在断点日志里的行直接复用，其余行分块翻译并记录"""
+        self.status = "running"
+        started = time.perf_counter()
+        if self.profile_path:
+            with metrics.profiled(self.profile_path) as self.profile:
+                self._run(retry_failed)
+        else:
+            self._run(retry_failed)
+        metrics.log_event(
+            "job", job_id=self.job_id, file_name=self.file_name, status=self.status, error=self.error,
+            rows=self.done, failed=self.failed, resumed=self.resumed, seconds=round(time.perf_counter() - started, 3)
+        )
+        return self
+
+    def _run(self, retry_failed):
+        try:
+            self.store.start_job(self.job_id, self.file_name, self.total)
+            checkpoint = self.store.load_rows(self.job_id, extra_columns=self.columns[len(RESULT_COLUMNS):])
+            if retry_failed:
+                checkpoint = {row_idx: row for row_idx, row in checkpoint.items() if row[3] == STATUS_OK}
+            self.resumed = len(checkpoint)
+
+            exporter = ResultExporter(self.fmt, path=self.export_path)
+            with self._open_source() as source:
+                row_offset = 0
+                for comments in metrics.iter_stage("parse", iter_comment_chunks(source, self.chunk_size)):
+                    indices = range(row_offset, row_offset + len(comments))
+                    row_offset += len(comments)
+                    chunk = self._process_chunk(comments, indices, checkpoint)
+                    with metrics.stage("export", len(chunk)):
+                        exporter.write_chunk(chunk)
+                    self._collect(chunk)
+            with metrics.stage("export"):
+                path = exporter.close(self.columns)
+            self.store.finish_job(self.job_id)
+            with self.lock:
+                self.exports[self.fmt] = path
+                self.status = "done"
+                # 没有失败行时不再需要原始文件
+                if not self.failed:
+                    self._data = None
+        except Exception as e:
+            # 先标记失败（页面据此停止轮询并提供「从断点继续」），再尽力记入断点日志：
+            # 失败本身可能就来自断点日志（如 database is locked），这里再出错不能让线程停在 running
+            with self.lock:
+                self.error = str(e)
+                self.status = "failed"
+            try:
+                self.store.finish_job(self.job_id, "failed")
+            except Exception:
+                pass
+
+    def _open_source(self):
+        if isinstance(self._data, str):
+            return open(self._data, "rb")
+        source = io.BytesIO(self._data)
+        source.name = self.file_name
+        return source
+
+    def _process_chunk(self, comments, indices, checkpoint):
+        """处理一块：断点里已有的行直接复用，其余行翻译后写入断点日志"""
+        rows = [checkpoint.get(row_idx) for row_idx in indices]
+        pending = [pos for pos, row in enumerate(rows) if row is None]
+        if pending:
+            df, errors = process_comment_chunk_with_status([comments[pos] for pos in pending], self.extra_targets)
+            self.store.save_rows(self.job_id, [indices[pos] for pos in pending], df, errors)
+            for pos, row in zip(pending, df.itertuples(index=False, name=None)):
+                rows[pos] = row
+        # 索引为评论在文件中的序号，分块拼接后仍然连续
+        return compact_result_frame(pd.DataFrame(rows, columns=self.columns, index=indices))
+
+    def _collect(self, chunk):
+        bad = chunk.loc[chunk["评论分类"] == "差评", "评论"]
+        with self.lock:
+            if self.keep_results:
+                self.chunks.append(chunk)
+                self._frame = None
+            with metrics.stage("keywords", len(bad)):
+                self.keywords.update(bad)
+            self.category_counts.update(chunk["评论分类"])
+            self.failed += int((chunk["翻译状态"] != STATUS_OK).sum())
+            self.done += len(chunk)
+
+    @property
+    def is_running(self):
+        return self.status in ("pending", "running")
+
+    @property
+    def progress(self):
+        return min(1.0, self.done / self.total) if self.total else 1.0
+
+    def result_frame(self):
+        """当前已完成的结果（同一批块只拼接一次，页面每次刷新都复用）"""
+        with self.lock:
+            frame, chunks = self._frame, list(self.chunks)
+        if frame is not None:
+            return frame
+        frame = pd.concat(chunks) if chunks else empty_result_frame(self.extra_targets)
+        with self.lock:
+            # 拼接期间没有新块时才缓存
+            if len(self.chunks) == len(chunks):
+                self._frame = frame
+        return frame
+
+    def tail_frame(self, n):
+        """最近完成的 n 行（运行中刷新时只拼接末尾几块，不拼接全部结果）"""
+        with self.lock:
+            chunks, rows = [], 0
+            for chunk in reversed(self.chunks):
+                if rows >= n:
+                    break
+                chunks.insert(0, chunk)
+                rows += len(chunk)
+        if not chunks:
+            return empty_result_frame(self.extra_targets)
+        return pd.concat(chunks).tail(n)
+
+    def keyword_snapshot(self):
+        """当前关键词统计的副本（避免读取时被后台线程修改）"""
+        with self.lock:
+            return KeywordCounter(self.keywords.ngram_sizes).merge(self.keywords)
+
+    def export(self, fmt):
+        """返回指定格式的导出文件；换格式时用已有结果补导一次，不重新翻译"""
+        with self.lock:
+            path = self.exports.get(fmt)
+        if path and os.path.exists(path):
+            return path
+        exporter = ResultExporter(fmt)
+        with self.lock:
+            chunks = list(self.chunks)
+        for chunk in chunks:
+            exporter.write_chunk(chunk)
+        path = exporter.close(self.columns)
+        with self.lock:
+            self.exports[fmt] = path
+        return path
@@ -0,0 +1,69 @@
+"""差评关键词与短语统计"""
+import re
+from collections import Counter
+
+KEYWORD_STOP_WORDS = frozenset([
+    "the", "a", "an", "and", "or", "but", "is", "are", "was", "were", "i", "you", "it", "this", "that"
+])
+KEYWORD_TOKEN_PATTERN = re.compile(r"\b[a-zA-Z]+\b")
+# 短语不跨越标点（"week, poor" 不算短语）
+KEYWORD_CLAUSE_PATTERN = re.compile(r"[.,!?;:()\n]+")
+# 默认同时统计的短语长度（1=单词，2/3=二元/三元短语）
+KEYWORD_NGRAM_SIZES = (1, 2, 3)
+
+def _is_keyword(word):
+    return len(word) > 2 and word not in KEYWORD_STOP_WORDS
+
+class KeywordCounter:
+    """差评关键词计数器：逐条累加不保留全部分词结果，各块的计数器可直接合并"""
+    def __init__(self, ngram_sizes=KEYWORD_NGRAM_SIZES):
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.counts = {n: Counter() for n in self.ngram_sizes}
+
+    def update(self, comments):
+        # 先收集整块的词和短语，最后每种长度只调用一次 Counter.update
+        keywords = []
+        phrases = {n: [] for n in self.counts if n > 1}
+        for comment in comments:
+            lowered = str(comment).lower()
+            if not phrases:
+                # 只统计单词时不必按子句拆分（标点本来就不会出现在词里）
+                keywords += [
+                    w for w in KEYWORD_TOKEN_PATTERN.findall(lowered) if len(w) > 2 and w not in KEYWORD_STOP_WORDS
+                ]
+                continue
+            for part in KEYWORD_CLAUSE_PATTERN.split(lowered):
+                # 每个子句只分词一次，各长度的短语共用
+                tokens = KEYWORD_TOKEN_PATTERN.findall(part)
+                flags = [_is_keyword(w) for w in tokens]
+                keywords += [w for w, flag in zip(tokens, flags) if flag]
+                for n, found in phrases.items():
+                    # 短语首尾必须是有效关键词，中间允许停用词（如 "waste of money"）
+                    found += [
+                        " ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1) if flags[i] and flags[i + n - 1]
+                    ]
+        if 1 in self.counts:
+            self.counts[1].update(keywords)
+        for n, found in phrases.items():
+            self.counts[n].update(found)
+        return self
+
+    def merge(self, other):
+        """合并另一个计数器（如其它块的统计结果）"""
+        for n, counter in other.counts.items():
+            self.counts.setdefault(n, Counter()).update(counter)
+        return self
+
+    def most_common(self, top_n=5, ngram_sizes=(1,)):
+        """返回指定长度范围内出现最多的词/短语"""
+        merged = Counter()
+        for n in ngram_sizes:
+            merged.update(self.counts.get(n, {}))
+        return merged.most_common(top_n)
+
+    def __bool__(self):
+        return any(self.counts.values())
+
+def extract_negative_keywords(bad_comments, top_n=5, ngram_sizes=(1,)):
+    """提取差评关键词"""
+    return KeywordCounter(ngram_sizes).update(bad_comments).most_common(top_n, ngram_sizes)
@@ -0,0 +1,112 @@
+"""本地语言预判：按文字和常用词识别片段的源语言，不需要翻译的片段（纯数字、表情、链接、已是目标语言）不发送接口"""
+import re
+from functools import lru_cache
+
+# 识别前去掉的链接和邮箱
+_URL_PATTERN = re.compile(r"(?:https?://|www\.)\S+|[\w.+-]+@[\w-]+\.[\w.]+", re.IGNORECASE)
+# 各文字的字符范围 -> 百度语言代码（latin 需要再按常用词细分）
+_SCRIPT_PATTERN = re.compile(
+    r"(?P<jp>[\u3040-\u30ff\u31f0-\u31ff\uff66-\uff9f]+)"
+    r"|(?P<kor>[\uac00-\ud7af\u1100-\u11ff\u3130-\u318f]+)"
+    r"|(?P<zh>[\u4e00-\u9fff\u3400-\u4dbf\uf900-\ufaff]+)"
+    r"|(?P<ru>[\u0400-\u04ff]+)"
+    r"|(?P<ara>[\u0600-\u06ff]+)"
+    r"|(?P<th>[\u0e00-\u0e7f]+)"
+    r"|(?P<el>[\u0370-\u03ff]+)"
+    r"|(?P<latin>[A-Za-z\u00c0-\u024f]+)"
+)
+_LATIN_WORD_PATTERN = re.compile(r"[a-z\u00c0-\u024f]+")
+
+# 拉丁字母语言的常用词（评论里最常见的虚词和评价词；英文里也常见的词如 die/per/non/con/le/van 不收录）
+LATIN_LANGUAGE_WORDS = {
+    "en": {
+        "the", "and", "is", "it", "this", "was", "for", "with", "not", "very", "but", "my", "of", "to", "you",
+        "good", "great", "bad", "product", "quality", "works"
+    },
+    "de": {
+        "der", "das", "und", "ist", "nicht", "sehr", "ich", "mit", "ein", "eine", "für", "auch", "aber",
+        "gut", "schlecht", "qualität", "schnell", "leider", "lieferung"
+    },
+    "fra": {
+        "les", "et", "est", "pas", "très", "je", "il", "des", "une", "pour", "avec", "mais", "bien",
+        "bon", "bonne", "produit", "qualité", "rapide", "ne"
+    },
+    "spa": {
+        "el", "los", "las", "y", "es", "muy", "que", "para", "pero", "una", "lo", "por",
+        "bueno", "buena", "malo", "mala", "calidad", "producto", "llegó"
+    },
+    "it": {
+        "il", "di", "che", "molto", "è", "sono", "della", "bene", "questo",
+        "buono", "ottimo", "prodotto", "qualità", "arrivato"
+    },
+    "pt": {
+        "não", "muito", "com", "uma", "mas", "bem", "isso", "bom", "ótimo", "produto",
+        "qualidade", "chegou"
+    },
+    "nl": {"het", "een", "en", "niet", "zeer", "heel", "ik", "voor", "maar", "goed", "dat", "snel", "kwaliteit"},
+}
+# 各语言特有的字母，每出现一个记 2 分
+LATIN_LANGUAGE_CHARS = {"de": "äöüß", "fra": "èêëœàçîû", "spa": "ñ¿¡", "pt": "ãõ", "it": "ìò"}
+# 纯 ASCII 文本多半是英文：其他语言至少要有这么多线索、且比英文多这么多才采用
+MIN_FOREIGN_EVIDENCE = 2
+# 常用词 -> 所属语言（按语言表顺序），逐词只查一次表
+_WORD_LANGUAGES = {}
+for _lang, _words in LATIN_LANGUAGE_WORDS.items():
+    for _word in _words:
+        _WORD_LANGUAGES.setdefault(_word, []).append(_lang)
+
+def _strip_urls(text):
+    if "://" in text or "www." in text or "@" in text:
+        return _URL_PATTERN.sub(" ", text)
+    return text
+
+def _detect_latin(text):
+    """拉丁字母文本：按常用词和特有字母打分
+
+    纯 ASCII 文本只有其他语言的线索足够多时才判为该语言，只有零星线索（且没有英文线索）时交给接口自动识别，
+    其余视为英文；带重音字母的文本没有任何线索时交给接口自动识别
+    """
+    lowered = text.lower()
+    scores = dict.fromkeys(LATIN_LANGUAGE_WORDS, 0)
+    for word in _LATIN_WORD_PATTERN.findall(lowered):
+        for lang in _WORD_LANGUAGES.get(word, ()):
+            scores[lang] += 1
+    if not lowered.isascii():
+        for lang, chars in LATIN_LANGUAGE_CHARS.items():
+            scores[lang] += 2 * sum(lowered.count(ch) for ch in chars)
+    if text.isascii():
+        foreign = max((lang for lang in scores if lang != "en"), key=scores.get)
+        if scores[foreign] >= MIN_FOREIGN_EVIDENCE and scores[foreign] >= scores["en"] + MIN_FOREIGN_EVIDENCE:
+            return foreign
+        return "auto" if scores[foreign] and not scores["en"] else "en"
+    # 同分时按语言表顺序（英文优先）
+    best = max(scores, key=scores.get)
+    return best if scores[best] else "auto"
+
+# 重复评论很多，识别结果按片段缓存
+@lru_cache(maxsize=65536)
+def detect_language(text):
+    """识别一个片段的源语言，返回百度语言代码
+
+    没有任何文字（纯数字、表情、符号、链接）时返回 None，表示不需要翻译；
+    无法判断的其他文字返回 "auto"，由接口自动识别
+    """
+    stripped = _strip_urls(text)
+    if stripped.isascii():
+        # 绝大多数英文评论走这条快速路径
+        if not any(ch.isalpha() for ch in stripped):
+            return None
+        return _detect_latin(stripped)
+
+    counts = {}
+    for match in _SCRIPT_PATTERN.finditer(stripped):
+        counts[match.lastgroup] = counts.get(match.lastgroup, 0) + len(match.group())
+    if not counts:
+        return "auto" if any(ch.isalpha() for ch in stripped) else None
+    # 日文夹杂汉字，出现假名即视为日文；其余取字符最多的文字（中英混排以中文为准）
+    if "jp" in counts:
+        return "jp"
+    if counts.get("zh", 0) >= counts.get("latin", 0) and "zh" in counts:
+        return "zh"
+    script = max(counts, key=counts.get)
+    return _detect_latin(stripped) if script == "latin" else script
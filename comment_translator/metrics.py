@@ -0,0 +1,278 @@
+"""运行指标：各处理阶段耗时、百度接口和各翻译后端的延迟与错误码、译文缓存命中、用户库读写延迟
+
+指标在进程内累计，可从本地端口以 Prometheus 文本格式读取（METRICS_PORT），
+也可以在每个任务结束时追加一行到 JSONL 日志（METRICS_LOG_FILE）。
+"""
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache, wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import config
+
+METRIC_PREFIX = "comment_translator_"
+# 延迟直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# 指标说明（Prometheus 的 HELP 行）
+METRIC_HELP = {
+    "stage_seconds": "各处理阶段每块的耗时（秒）",
+    "stage_rows_total": "各处理阶段处理的行数",
+    "baidu_request_seconds": "百度翻译接口单次请求耗时（秒，含失败请求）",
+    "baidu_requests_total": "百度翻译接口请求数（code=0 为成功，其余为错误码或 exception）",
+    "backend_request_seconds": "路由器发给各翻译后端的批次耗时（秒，含内部重试）",
+    "backend_requests_total": "路由器发给各翻译后端的批次数（result=ok 或错误码）",
+    "translation_cache_lookups_total": "译文缓存查询的片段数（result=hit/miss）",
+    "translation_segments_total": "待翻译片段数（按本地识别的源语言，lang=skip 为无需翻译）",
+    "user_store_seconds": "用户库读写耗时（秒）",
+}
+
+class MetricsRegistry:
+    """线程安全的计数器和直方图，按（指标名, 标签）分别累计"""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.lock = threading.Lock()
+        self.buckets = tuple(buckets)
+        self.counters = {}
+        # (指标名, 标签) -> [各桶计数..., +Inf 桶计数, 总和]
+        self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        slot = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[slot] += 1
+            histogram[-1] += value
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        """当前所有指标的副本：{"counters": [...], "histograms": [...]}"""
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: list(value) for key, value in self.histograms.items()}
+        return {
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+            "histograms": [
+                {
+                    "name": name, "labels": dict(labels), "count": sum(counts[:-1]), "sum": round(counts[-1], 6),
+                    "p50": self._quantile(counts, 0.5), "p95": self._quantile(counts, 0.95)
+                }
+                for (name, labels), counts in sorted(histograms.items())
+            ]
+        }
+
+    def _quantile(self, counts, q):
+        """按桶线性插值估算分位数（同 Prometheus histogram_quantile），落在 +Inf 桶时取最大有限上界"""
+        total = sum(counts[:-1])
+        if not total:
+            return None
+        rank = q * total
+        cumulative = 0
+        for i, bound in enumerate(self.buckets):
+            previous = cumulative
+            cumulative += counts[i]
+            if cumulative >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (bound - lower) * (rank - previous) / counts[i]
+        return self.buckets[-1]
+
+    def render_prometheus(self):
+        """Prometheus 文本格式"""
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: list(value) for key, value in self.histograms.items()}
+        lines = []
+        typed = set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# HELP {METRIC_PREFIX}{name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {METRIC_PREFIX}{name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, "counter")
+            lines.append(f"{METRIC_PREFIX}{name}{_format_labels(labels)} {value}")
+        for (name, labels), counts in sorted(histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts[:-1]):
+                cumulative += count
+                lines.append(f"{METRIC_PREFIX}{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{METRIC_PREFIX}{name}_sum{_format_labels(labels)} {counts[-1]}")
+            lines.append(f"{METRIC_PREFIX}{name}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels) + "}"
+
+# 进程内共享的指标（Streamlit 所有会话、后台任务线程共用）
+REGISTRY = MetricsRegistry()
+
+def inc(name, value=1, **labels):
+    REGISTRY.inc(name, value, **labels)
+
+def observe(name, value, **labels):
+    REGISTRY.observe(name, value, **labels)
+
+@contextmanager
+def timer(name, **labels):
+    """记录 with 块的耗时（异常退出也记录）"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(name, time.perf_counter() - started, **labels)
+
+def timed(name, **labels):
+    """装饰器版的 timer"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def stage(name, rows=0):
+    """记录一个处理阶段（parse/translate/classify/keywords/export）的耗时和行数"""
+    with timer("stage_seconds", stage=name):
+        yield
+    if rows:
+        REGISTRY.inc("stage_rows_total", rows, stage=name)
+
+def iter_stage(name, iterable):
+    """逐项迭代并把每次取下一项的耗时记为一个阶段（用于分块读取文件）"""
+    iterator = iter(iterable)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        REGISTRY.observe("stage_seconds", time.perf_counter() - started, stage=name)
+        REGISTRY.inc("stage_rows_total", len(item), stage=name)
+        yield item
+
+# ========== 汇总与输出 ==========
+def summary():
+    """面向人看的汇总：各阶段、接口、各翻译后端、缓存命中率、用户库（时间单位毫秒）"""
+    snapshot = REGISTRY.snapshot()
+    counters = snapshot["counters"]
+    ms = lambda seconds: None if seconds is None else round(seconds * 1000, 1)
+    result = {
+        "stages": {}, "api": {"requests": {}}, "backends": {}, "cache_hit_rate": None, "languages": {}, "user_store": {}
+    }
+    for item in snapshot["histograms"]:
+        labels = item["labels"]
+        entry = {"count": item["count"], "total_s": round(item["sum"], 3), "p50_ms": ms(item["p50"]), "p95_ms": ms(item["p95"])}
+        if item["name"] == "stage_seconds":
+            result["stages"][labels["stage"]] = entry
+        elif item["name"] == "baidu_request_seconds":
+            result["api"].update(entry)
+        elif item["name"] == "backend_request_seconds":
+            result["backends"][labels["backend"]] = dict(entry, results={})
+        elif item["name"] == "user_store_seconds":
+            result["user_store"][labels["op"]] = entry
+    for item in counters:
+        if item["name"] == "stage_rows_total" and item["labels"]["stage"] in result["stages"]:
+            result["stages"][item["labels"]["stage"]]["rows"] = item["value"]
+        elif item["name"] == "baidu_requests_total":
+            result["api"]["requests"][item["labels"]["code"]] = item["value"]
+        elif item["name"] == "backend_requests_total" and item["labels"]["backend"] in result["backends"]:
+            result["backends"][item["labels"]["backend"]]["results"][item["labels"]["result"]] = item["value"]
+        elif item["name"] == "translation_segments_total":
+            result["languages"][item["labels"]["lang"]] = item["value"]
+    lookups = {item["labels"]["result"]: item["value"] for item in counters if item["name"] == "translation_cache_lookups_total"}
+    if sum(lookups.values()):
+        result["cache_hit_rate"] = round(lookups.get("hit", 0) / sum(lookups.values()), 4)
+    return result
+
+_log_lock = threading.Lock()
+
+def log_event(event, **fields):
+    """配置了 METRICS_LOG_FILE 时追加一行 JSON（事件字段 + 当前指标汇总）"""
+    if not config.METRICS_LOG_FILE:
+        return
+    record = {"time": datetime.now().isoformat(timespec="seconds"), "event": event, **fields, "metrics": summary()}
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _log_lock, open(config.METRICS_LOG_FILE, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] == "/metrics":
+            body, content_type = REGISTRY.render_prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path.split("?")[0] == "/metrics.json":
+            body, content_type = json.dumps(summary(), ensure_ascii=False), "application/json; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+@lru_cache(maxsize=None)
+def start_metrics_server(port, host="127.0.0.1"):
+    """在后台线程开启本地指标端口（/metrics 为 Prometheus 文本，/metrics.json 为汇总），每个端口只开启一次
+
+    端口被占用时返回 None（多进程部署时只有一个进程能提供端口）
+    """
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError:
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+# ========== 性能分析 ==========
+@contextmanager
+def profiled(path=None, top_n=30):
+    """opt-in 的 cProfile 分析（只覆盖当前线程，翻译请求线程内的耗时体现为等待）
+
+    结束后 report["text"] 为按累计耗时排序的前 top_n 项；给定 path 时另存 .prof 文件
+    """
+    report = {"text": "", "path": path}
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield report
+    finally:
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(top_n)
+        report["text"] = output.getvalue()
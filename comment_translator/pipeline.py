@@ -0,0 +1,79 @@
+"""评论处理流水线：读取 → 翻译 → 分类 → 关键词 → 导出"""
+import os
+
+import pandas as pd
+
+from . import config, metrics
+from .export import TARGET_COLUMN_PREFIX, compact_result_frame, result_columns
+from .ingest import has_comment_column
+from .sentiment import classify_comments
+from .translation import format_error, translate_multi_with_status
+
+# 翻译状态列中成功行的取值
+STATUS_OK = "成功"
+
+def resolve_extra_targets(extra_targets=None):
+    """除中文外的目标语言（None 时取 config.EXTRA_TARGET_LANGS；去重，中文本来就有「中文翻译」列）"""
+    extra_targets = config.EXTRA_TARGET_LANGS if extra_targets is None else extra_targets
+    return [lang for lang in dict.fromkeys(config.parse_list(extra_targets)) if lang != "zh"]
+
+def process_comment_chunk_with_status(comments, extra_targets=None):
+    """翻译并分类一块评论，返回 (紧凑列类型的结果表, 每行的结构化错误或 None)
+
+    每种额外目标语言多一列译文，各目标语言共用一次语言识别、缓存和并发批次；
+    任一目标语言失败都记为该行失败（错误取中文优先的第一个）
+    """
+    extra_targets = resolve_extra_targets(extra_targets)
+    to_langs = ["zh", *extra_targets]
+    with metrics.stage("translate", len(comments)):
+        statuses = translate_multi_with_status(comments, to_langs)
+    with metrics.stage("classify", len(comments)):
+        categories = classify_comments(comments).to_numpy()
+    errors = [
+        next((statuses[lang][i][1] for lang in to_langs if statuses[lang][i][1]), None) for i in range(len(comments))
+    ]
+    df = compact_result_frame(pd.DataFrame({
+        "评论": comments,
+        "中文翻译": [translation for translation, _ in statuses["zh"]],
+        "评论分类": categories,
+        "翻译状态": [format_error(error) if error else STATUS_OK for error in errors],
+        **{TARGET_COLUMN_PREFIX + lang: [translation for translation, _ in statuses[lang]] for lang in extra_targets}
+    }, columns=result_columns(extra_targets)))
+    return df, errors
+
+def process_comment_chunk(comments, extra_targets=None):
+    """翻译并分类一块评论，返回结果表（失败行译文为空，原因写在「翻译状态」列）"""
+    return process_comment_chunk_with_status(comments, extra_targets)[0]
+
+def process_file(path, output_dir, fmt="xlsx", top_n=5, retry_failed=False, profile=False, extra_targets=None):
+    """处理单个CSV/XLSX文件：结果按块写入 output_dir，返回处理摘要
+
+    每块结果都记入断点日志，重复运行会从断点继续；retry_failed 时只重新翻译上次失败的行；
+    profile 时用 cProfile 分析本次处理，统计文件存为 output_dir 下的 <文件名>.prof；
+    extra_targets 为除中文外的目标语言（默认取配置）
+    """
+    from .jobs import TranslationJob, file_job_key
+
+    summary = {"file": path, "rows": 0, "好评": 0, "中性": 0, "差评": 0, "failed": 0, "output": None, "keywords": []}
+    with open(path, "rb") as f:
+        if not has_comment_column(f):
+            summary["error"] = "文件中未找到「评论」列"
+            return summary
+    stem = os.path.splitext(os.path.basename(path))[0]
+    extra_targets = resolve_extra_targets(extra_targets)
+    job = TranslationJob(
+        file_job_key(path, owner="cli", extra_targets=extra_targets), path, path, fmt=fmt, extra_targets=extra_targets,
+        export_path=os.path.join(output_dir, f"{stem}_翻译结果.{fmt}"), keep_results=False,
+        profile_path=os.path.join(output_dir, f"{stem}.prof") if profile else None
+    ).run(retry_failed=retry_failed)
+    if job.status == "failed":
+        summary["error"] = job.error
+        return summary
+    summary.update(job.category_counts)
+    summary.update(
+        rows=job.done, failed=job.failed, resumed=job.resumed,
+        output=job.exports[fmt], keywords=job.keywords.most_common(top_n)
+    )
+    if profile:
+        summary["profile"] = job.profile["path"]
+    return summary
@@ -0,0 +1,90 @@
+"""评论情感分类（词典 + 合并正则，每条评论只扫描一遍）"""
+import json
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# 默认情感词典（词 -> 权重），可用 sentiment_lexicon.json 覆盖，文件修改后自动重新加载
+SENTIMENT_LEXICON_FILE = "sentiment_lexicon.json"
+DEFAULT_SENTIMENT_LEXICON = {
+    "positive": {
+        "good": 1, "nice": 1, "excellent": 1, "perfect": 1, "great": 1, "love": 1, "loved": 1, "loves": 1,
+        "best": 1, "satisfied": 1, "recommend": 1, "recommended": 1
+    },
+    "negative": {
+        "bad": 1, "terrible": 1, "worse": 1, "poor": 1, "broken": 1, "slow": 1, "disappointed": 1,
+        "disappointing": 1, "defective": 1, "waste": 1, "wasted": 1
+    },
+    # 否定词：紧跟（或隔一个词）在情感词前时反转其极性，如 "not good"、"not very good"
+    "negators": ["not", "no", "never", "hardly", "don't", "doesn't", "didn't", "isn't", "wasn't", "aren't", "won't"]
+}
+
+class SentimentClassifier:
+    """把整个词典编译成一个带词边界的正则：每次匹配得到（否定词, 情感词），按词查权重打分"""
+    def __init__(self, lexicon):
+        weights = {}
+        for word, weight in lexicon.get("positive", {}).items():
+            weights[word.lower()] = float(weight)
+        for word, weight in lexicon.get("negative", {}).items():
+            weights[word.lower()] = -float(weight)
+        negators = set()
+        for word in lexicon.get("negators", []):
+            negators.update({word.lower(), word.lower().replace("'", "’")})
+        negs = "|".join(re.escape(w) for w in sorted(negators, key=len, reverse=True))
+        self.weights = weights
+        self.pattern = None
+        if weights:
+            # 长词优先；否定词与情感词之间最多隔一个非情感词（如 "not very good"）
+            words = "|".join(re.escape(w) for w in sorted(weights, key=len, reverse=True))
+            negated = rf"(?:({negs})\s+(?:(?!(?:{words})\b)[a-z'’]+\s+)?)?" if negs else "()"
+            self.pattern = re.compile(rf"\b{negated}({words})\b")
+
+    def score_text(self, text):
+        """单条打分：正数偏好评，负数偏差评（被否定的词按相反极性计）"""
+        if not isinstance(text, str):
+            # None 和 NaN（NaN 不等于自身）视为空评论
+            text = "" if text is None or text != text else str(text)
+        if self.pattern is None:
+            return 0.0
+        weights = self.weights
+        score = 0.0
+        for negator, word in self.pattern.findall(text.lower()):
+            score += -weights[word] if negator else weights[word]
+        return score
+
+    def score(self, texts):
+        """整列打分（逐条 score_text，保留输入的索引）"""
+        texts = pd.Series(texts)
+        return pd.Series([self.score_text(text) for text in texts.tolist()], index=texts.index, dtype=float)
+
+    def classify(self, texts):
+        """整列分类，返回与输入等长的「好评/中性/差评」"""
+        scores = self.score(texts)
+        values = scores.to_numpy(dtype=float)
+        return pd.Series(np.select([values > 0, values < 0], ["好评", "差评"], "中性"), index=scores.index)
+
+@lru_cache(maxsize=4)
+def _compile_sentiment_classifier(lexicon_file, lexicon_mtime):
+    """按词典文件修改时间缓存编译结果（文件变化即重新编译）"""
+    lexicon = DEFAULT_SENTIMENT_LEXICON
+    if lexicon_mtime is not None:
+        with open(lexicon_file, "r", encoding="utf-8") as f:
+            lexicon = {**DEFAULT_SENTIMENT_LEXICON, **json.load(f)}
+    return SentimentClassifier(lexicon)
+
+def get_sentiment_classifier():
+    """获取当前词典对应的分类器"""
+    mtime = os.path.getmtime(SENTIMENT_LEXICON_FILE) if os.path.exists(SENTIMENT_LEXICON_FILE) else None
+    return _compile_sentiment_classifier(SENTIMENT_LEXICON_FILE, mtime)
+
+def classify_comments(texts):
+    """批量评论情感分类"""
+    return get_sentiment_classifier().classify(texts)
+
+def classify_comment(text):
+    """评论情感分类（单条）"""
+    score = get_sentiment_classifier().score_text(text)
+    return "好评" if score > 0 else "差评" if score < 0 else "中性"
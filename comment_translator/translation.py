@@ -0,0 +1,318 @@
+"""翻译：百度翻译后端（分批签名请求、限流、失败重试），以及经路由器分发的批量、多目标语言翻译"""
+import hashlib
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import config, metrics
+from .cache import get_translation_cache
+from .engine import TranslationBackend, get_translation_router
+from .language import detect_language
+
+# 单次请求 q 参数的字节上限（百度通用翻译要求不超过6000字节）
+BATCH_MAX_BYTES = 6000
+# 句子边界：西文句末标点后的空白，或中日文句末标点之后
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?;])\s+|(?<=[。！？；])")
+
+def _split_segments(query):
+    """把一条评论按换行拆成待翻译片段（空行不发送）"""
+    if not isinstance(query, str):
+        # None 和 NaN（NaN 不等于自身）视为空评论
+        query = "" if query is None or query != query else str(query)
+    # 合并多余空白，相同内容的片段归一为同一个缓存键
+    return [" ".join(line.split()) for line in query.splitlines() if line.strip()]
+
+def _split_long_segment(segment):
+    """超过单次请求字节上限的片段按句拆成多段（单句仍超长时按字节硬切），其余片段原样返回"""
+    # 每个片段发送时还要占一个换行分隔符
+    limit = BATCH_MAX_BYTES - 1
+    # UTF-8 每个字符最多 4 字节，短片段不用编码就能判断
+    if len(segment) * 4 <= limit or len(segment.encode("utf-8")) <= limit:
+        return [segment]
+    pieces, current = [], ""
+    for sentence in _SENTENCE_BOUNDARY.split(segment):
+        if not sentence:
+            continue
+        candidate = f"{current} {sentence}" if current else sentence
+        if len(candidate.encode("utf-8")) <= limit:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        while len(sentence.encode("utf-8")) > limit:
+            # 截断到字节上限以内（不切开多字节字符）
+            cut = len(sentence.encode("utf-8")[:limit].decode("utf-8", "ignore"))
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        current = sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+def _pack_batches(segments):
+    """按字节预算把片段打包成批次，返回每批的片段下标"""
+    batches, current, current_bytes = [], [], 0
+    for i, segment in enumerate(segments):
+        # 每个片段额外占一个换行分隔符
+        segment_bytes = len(segment.encode("utf-8")) + 1
+        if current and current_bytes + segment_bytes > BATCH_MAX_BYTES:
+            batches.append(current)
+            current, current_bytes = [], 0
+        current.append(i)
+        current_bytes += segment_bytes
+    if current:
+        batches.append(current)
+    return batches
+
+# 可重试的错误码：54003访问频率受限、52001请求超时、54005长query请求频繁
+RETRY_ERROR_CODES = {"54003", "52001", "54005"}
+MAX_RETRIES = 4
+RETRY_BASE_DELAY = 1.0
+
+class TokenBucket:
+    """令牌桶限流器（线程安全），保证请求速率不超过QPS上限"""
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """取一个令牌，令牌不足时阻塞等待"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def get_rate_limiter():
+    """进程内共享的限流器（所有会话共用同一个QPS额度）"""
+    return _create_rate_limiter(config.TRANSLATE_QPS)
+
+@lru_cache(maxsize=None)
+def _create_rate_limiter(qps):
+    return TokenBucket(qps)
+
+def _backoff_delay(attempt):
+    """带随机抖动的指数退避时间"""
+    return RETRY_BASE_DELAY * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+def translation_error(code, message):
+    """结构化的翻译错误：code 为百度错误码，网络/程序异常为 exception，译文缺失为 missing"""
+    return {"code": str(code), "message": message}
+
+def format_error(error):
+    """把结构化错误转成展示用的文字"""
+    prefix = "翻译异常" if error["code"] == "exception" else "翻译失败"
+    return f"{prefix}：{error['message']}"
+
+def _record_request(started, code):
+    """记录一次接口请求的耗时和返回码（0 为成功）"""
+    metrics.observe("baidu_request_seconds", time.perf_counter() - started)
+    metrics.inc("baidu_requests_total", code=code)
+
+class BaiduTranslateClient(TranslationBackend):
+    """百度翻译后端（HTTP客户端）：复用连接池（keep-alive），负责签名、限流和失败重试"""
+    name = "baidu"
+
+    def __init__(self, app_id, secret_key, api_url=None, pool_size=None, connect_timeout=None,
+                 read_timeout=None, compression=None, max_retries=None):
+        self.app_id = app_id
+        self.secret_key = secret_key
+        self.api_url = api_url or config.BAIDU_API_URL
+        self.max_retries = MAX_RETRIES if max_retries is None else max_retries
+        self.timeout = (
+            config.HTTP_CONNECT_TIMEOUT if connect_timeout is None else connect_timeout,
+            config.HTTP_READ_TIMEOUT if read_timeout is None else read_timeout
+        )
+        pool_size = pool_size or max(config.HTTP_POOL_SIZE, config.TRANSLATE_WORKERS)
+        compression = config.HTTP_COMPRESSION if compression is None else compression
+        self.session = requests.Session()
+        # 连接池大小不小于并发线程数，池满时等待空闲连接而不是新建连接
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Connection": "keep-alive",
+            "Accept-Encoding": "gzip, deflate" if compression else "identity"
+        })
+
+    @property
+    def cost_per_million_chars(self):
+        return config.BAIDU_COST_PER_MILLION_CHARS
+
+    @property
+    def daily_char_quota(self):
+        return config.BAIDU_DAILY_CHAR_QUOTA
+
+    def translate_lines(self, lines, from_lang="en", to_lang="zh"):
+        """发送一个批次（POST，整批只签名一次），返回 (逐行译文, 结构化错误)"""
+        query = "\n".join(lines)
+        limiter = get_rate_limiter()
+        for attempt in range(self.max_retries + 1):
+            limiter.acquire()
+            started = time.perf_counter()
+            try:
+                salt = str(random.randint(32768, 65536))
+                sign = hashlib.md5((self.app_id + query + salt + self.secret_key).encode()).hexdigest()
+                data = {
+                    "q": query,
+                    "from": from_lang,
+                    "to": to_lang,
+                    "appid": self.app_id,
+                    "salt": salt,
+                    "sign": sign
+                }
+                res = self.session.post(self.api_url, data=data, timeout=self.timeout)
+                result = res.json()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                _record_request(started, "exception")
+                if attempt < self.max_retries:
+                    time.sleep(_backoff_delay(attempt))
+                    continue
+                return None, translation_error("exception", str(e))
+            except Exception as e:
+                _record_request(started, "exception")
+                return None, translation_error("exception", str(e))
+            _record_request(started, "0" if "trans_result" in result else str(result.get("error_code", "unknown")))
+            if "trans_result" in result:
+                break
+            if str(result.get("error_code")) in RETRY_ERROR_CODES and attempt < self.max_retries:
+                time.sleep(_backoff_delay(attempt))
+                continue
+            return None, translation_error(result.get("error_code", "unknown"), result.get("error_msg", "未知错误"))
+
+        entries = result["trans_result"]
+        if len(entries) == len(lines):
+            return [entry["dst"] for entry in entries], None
+        # 返回条数与发送行数不一致时按原文对齐，对不上的行单独记为失败
+        dst_by_src = {entry.get("src", "").strip(): entry["dst"] for entry in entries}
+        return [dst_by_src.get(line) for line in lines], translation_error("missing", "译文缺失")
+
+    def close(self):
+        self.session.close()
+
+def get_translate_client(max_retries=None):
+    """进程内共享的百度翻译客户端（所有会话复用同一个连接池；配置变化时新建）"""
+    # 连接池不小于并发线程数（并发数变化时也新建客户端）
+    return _create_translate_client(
+        config.APP_ID, config.SECRET_KEY, config.BAIDU_API_URL, max(config.HTTP_POOL_SIZE, config.TRANSLATE_WORKERS),
+        config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT, config.HTTP_COMPRESSION, max_retries
+    )
+
+@lru_cache(maxsize=4)
+def _create_translate_client(*args):
+    return BaiduTranslateClient(*args)
+
+def _group_by_language(segments, languages, from_lang, to_lang):
+    """本地预判：返回 (无需翻译的片段, {源语言: [片段]})，languages 为 {片段: 识别出的语言}
+
+    纯数字/表情/链接和已是目标语言的片段原样保留；from_lang 为 "auto" 时按识别结果分组，否则全部按 from_lang 发送
+    """
+    unchanged, groups = [], {}
+    for segment in segments:
+        lang = languages[segment]
+        if lang is None or lang == to_lang:
+            unchanged.append(segment)
+        else:
+            groups.setdefault(lang if from_lang == "auto" else from_lang, []).append(segment)
+    return unchanged, groups
+
+def translate_multi_with_status(queries, to_langs=("zh",), from_lang="auto"):
+    """把同一批评论翻译成多种目标语言，返回 {目标语言: [(译文, 错误)]}（每个列表按输入顺序）
+
+    拆分、去重和语言识别只做一次；各目标语言先查共用的译文缓存，未命中的按（源语言, 目标语言）打包，
+    所有目标语言的批次放进同一个线程池，经路由器分发到各后端。失败只影响所在行和所在目标语言。
+    超过单次请求上限的片段按句拆开发送，译文用空格拼回
+    """
+    queries = list(queries)
+    row_segments = [_split_segments(query) for query in queries]
+    # 同一批数据中重复的片段只翻译一次
+    pieces_of = {
+        segment: _split_long_segment(segment) for segments in row_segments for segment in segments
+    }
+    unique_segments = list(dict.fromkeys(piece for pieces in pieces_of.values() for piece in pieces))
+    languages = {segment: detect_language(segment) for segment in unique_segments}
+    cache = get_translation_cache()
+
+    translated = {to_lang: {} for to_lang in to_langs}
+    errors = {to_lang: {} for to_lang in to_langs}
+    # 每个批次只含同一种源语言和目标语言：[(源语言, 目标语言, [片段])]
+    requests_to_send = []
+    for to_lang in to_langs:
+        unchanged, groups = _group_by_language(unique_segments, languages, from_lang, to_lang)
+        translated[to_lang].update((segment, segment) for segment in unchanged)
+        metrics.inc("translation_segments_total", len(unchanged), lang="skip")
+        for lang, segments in groups.items():
+            metrics.inc("translation_segments_total", len(segments), lang=lang)
+            found = cache.get_many(segments, lang, to_lang)
+            translated[to_lang].update(found)
+            missing = [segment for segment in segments if segment not in found]
+            metrics.inc("translation_cache_lookups_total", len(found), result="hit")
+            metrics.inc("translation_cache_lookups_total", len(missing), result="miss")
+            requests_to_send += [(lang, to_lang, [missing[i] for i in batch]) for batch in _pack_batches(missing)]
+
+    if requests_to_send:
+        # 各批次并发发送（各后端自行限流），map 保证结果按批次顺序返回
+        router = get_translation_router()
+        with ThreadPoolExecutor(max_workers=min(config.TRANSLATE_WORKERS, len(requests_to_send))) as pool:
+            batch_results = list(pool.map(
+                lambda request: router.translate_lines(request[2], request[0], request[1]), requests_to_send
+            ))
+        fresh = {}
+        for (lang, to_lang, lines), (translations, error) in zip(requests_to_send, batch_results):
+            for pos, segment in enumerate(lines):
+                dst = translations[pos] if translations else None
+                if dst is None:
+                    errors[to_lang][segment] = error
+                else:
+                    fresh.setdefault((lang, to_lang), {})[segment] = dst
+        for (lang, to_lang), pairs in fresh.items():
+            cache.put_many(pairs, lang, to_lang)
+            translated[to_lang].update(pairs)
+
+    # 译文分发回每一行，多行评论按原换行重新拼接
+    results = {}
+    for to_lang in to_langs:
+        done, failed = translated[to_lang], errors[to_lang]
+        results[to_lang] = []
+        for segments in row_segments:
+            pieces = [piece for segment in segments for piece in pieces_of[segment]]
+            error = next((failed[piece] for piece in pieces if piece in failed), None)
+            results[to_lang].append(("", error) if error else (
+                "\n".join(" ".join(done[piece] for piece in pieces_of[segment]) for segment in segments), None
+            ))
+    return results
+
+def translate_batch_with_status(queries, from_lang="auto", to_lang="zh"):
+    """批量翻译：本地预判语言（无需翻译的片段不发送），其余先查缓存，未命中的按源语言分组打包后并发发送
+
+    from_lang 为 "auto" 时每个片段按本地识别的语言发送；失败只影响所在行。
+    按输入顺序返回 [(译文, 错误)]；成功时错误为 None，失败时译文为空、错误为 translation_error
+    """
+    return translate_multi_with_status(queries, (to_lang,), from_lang)[to_lang]
+
+def baidu_translate_batch(queries, from_lang="auto", to_lang="zh"):
+    """批量翻译，译文按输入顺序返回（失败的行返回错误说明文字）"""
+    return [
+        format_error(error) if error else translation
+        for translation, error in translate_batch_with_status(queries, from_lang, to_lang)
+    ]
+
+def baidu_translate(query):
+    """百度翻译接口（单条）"""
+    if not query:
+        return ""
+    return baidu_translate_batch([query])[0]
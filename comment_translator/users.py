@@ -0,0 +1,317 @@
+"""用户存储：会员有效期、免费额度和解锁码兑换（SQLite）
+
+用户记录在进程内按用户短时缓存，写入时失效，页面重跑时状态没变的用户不读库。
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+
+from . import config, metrics
+
+def connect_user_db(db_file=None):
+    """打开用户库连接（WAL模式，支持多会话并发读写；事务由调用方显式控制）"""
+    conn = sqlite3.connect(db_file or config.USER_DB_FILE, timeout=10, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def _store_op(kind):
+    """记录用户库操作的耗时（按读/写和函数名区分）"""
+    return lambda func: metrics.timed("user_store_seconds", kind=kind, op=func.__name__.lstrip("_"))(func)
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+def init_user_data():
+    """确保用户库已初始化（同一个库文件每个进程只初始化一次）"""
+    _init_user_db(config.USER_DB_FILE, config.USER_DATA_FILE)
+
+@lru_cache(maxsize=None)
+def _init_user_db(db_file, json_file):
+    """建表，并把旧版 vip_users.json 一次性迁移进来"""
+    conn = connect_user_db(db_file)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS users ("
+        "user_id TEXT PRIMARY KEY, expire_time TEXT NOT NULL, used_count INTEGER NOT NULL DEFAULT 0, "
+        "last_date TEXT NOT NULL, used_codes TEXT NOT NULL DEFAULT '[]', expire_at REAL)"
+    )
+    # 到期时间改存时间戳（expire_at），expire_time 文本列只作可读备份
+    if "expire_at" not in {row["name"] for row in conn.execute("PRAGMA table_info(users)")}:
+        try:
+            conn.execute("ALTER TABLE users ADD COLUMN expire_at REAL")
+        except sqlite3.OperationalError as e:
+            # 多个进程同时升级旧库时，其他进程可能已经加上了这一列
+            if "duplicate column" not in str(e):
+                raise
+    if os.path.exists(json_file):
+        with open(json_file, "r", encoding="utf-8") as f:
+            user_data = json.load(f)
+        now = datetime.now()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "INSERT OR IGNORE INTO users (user_id, expire_time, used_count, last_date, used_codes) VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    user_id,
+                    info.get("expire_time", now.strftime("%Y-%m-%d %H:%M:%S")),
+                    info.get("used_count", 0),
+                    info.get("last_date", now.strftime("%Y-%m-%d")),
+                    json.dumps(info.get("used_codes", []), ensure_ascii=False)
+                )
+                for user_id, info in user_data.items()
+            ]
+        )
+        conn.execute("COMMIT")
+        # 保留原文件作备份，避免重复迁移
+        os.replace(json_file, json_file + ".migrated")
+
+    # 已兑换解锁码单独建表，code 主键保证每个码只能兑换一次
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS redeemed_codes ("
+        "code TEXT PRIMARY KEY, user_id TEXT NOT NULL, redeemed_at TEXT NOT NULL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_redeemed_codes_user ON redeemed_codes (user_id)")
+    # users.used_codes 为旧字段，迁移到 redeemed_codes 后清空
+    legacy = conn.execute("SELECT user_id, used_codes FROM users WHERE used_codes != '[]'").fetchall()
+    if legacy:
+        migrated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "INSERT OR IGNORE INTO redeemed_codes VALUES (?, ?, ?)",
+            [(code, row["user_id"], migrated_at) for row in legacy for code in json.loads(row["used_codes"])]
+        )
+        conn.execute("UPDATE users SET used_codes = '[]'")
+        conn.execute("COMMIT")
+    # 旧记录（及刚迁移的JSON记录）按文本到期时间补上时间戳
+    pending = conn.execute("SELECT user_id, expire_time FROM users WHERE expire_at IS NULL").fetchall()
+    if pending:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "UPDATE users SET expire_at = ? WHERE user_id = ?",
+            [(datetime.strptime(row["expire_time"], "%Y-%m-%d %H:%M:%S").timestamp(), row["user_id"]) for row in pending]
+        )
+        conn.execute("COMMIT")
+    conn.close()
+
+# ========== 用户记录缓存 ==========
+# (库文件, 用户标识) -> (过期时刻, 记录或 None)；本进程写入时立即失效，TTL 兜底其他进程的修改
+_user_cache = {}
+# 缓存条目超过该数量时清理已过期的条目
+USER_CACHE_MAX_ENTRIES = 10000
+_user_cache_lock = threading.Lock()
+
+def _invalidate_user(user_id):
+    with _user_cache_lock:
+        _user_cache.pop((config.USER_DB_FILE, user_id), None)
+
+@_store_op("read")
+def _fetch_user(user_id):
+    init_user_data()
+    conn = connect_user_db()
+    try:
+        row = conn.execute("SELECT * FROM users WHERE user_id = ?", (user_id,)).fetchone()
+    finally:
+        conn.close()
+    return dict(row) if row is not None else None
+
+def load_user(user_id):
+    """按用户标识读取单条记录（短时缓存），不存在返回 None"""
+    key = (config.USER_DB_FILE, user_id)
+    now = time.monotonic()
+    with _user_cache_lock:
+        entry = _user_cache.get(key)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+    record = _fetch_user(user_id)
+    with _user_cache_lock:
+        if len(_user_cache) >= USER_CACHE_MAX_ENTRIES:
+            for stale in [k for k, (expires, _) in _user_cache.items() if expires <= now]:
+                del _user_cache[stale]
+        _user_cache[key] = (now + config.USER_CACHE_TTL, record)
+    return record
+
+# 解锁码对应时长配置
+CODE_DURATION_MAP = {
+    # 体验卡（19元/7天）
+    "8A9B7C6D5E4F3G2H": 7, "7F8E9D0C1B2A3Z4Y": 7, "6Y5X4W3V2U1T0S9R": 7,
+    "5R4S3T2U1V0W9X8Y": 7, "4H3G2F1E0D9C8B7A": 7, "3A2B1C0D9E8F7G6H": 7,
+    "2H1G0F9E8D7C6B5A": 7, "1A0B9C8D7E6F5G4H": 7, "9H8G7F6E5D4C3B2A": 7,
+    "8B7A6Z5Y4X3W2V1U": 7, "7U6V5W4X3Y2Z1A0B": 7, "6B0A1Z2Y3X4W5V6U": 7,
+    "5U5V4W3X2Y1Z0A9B": 7, "4B9A8Z7Y6X5W4V3U": 7, "3U3V2W1X0Y9Z8A7B": 7,
+    "2B7A8Z9Y0X1W2V3U": 7, "1U1V0W9X8Y7Z6A5B": 7, "0B5A6Z7Y8X9W0V1U": 7,
+    "9U9V8W7X6Y5Z4A3B": 7, "8B3A4Z5Y6X7W8V9U": 7,
+    # 月卡（49元/30天）
+    "5X6W7V8U9T0S1R2Q": 30, "4Q3R2S1T0U9V8W7X": 30, "3X7W8V9U0T1S2R3Q": 30,
+    "2Q2R3S4T5U6V7W8X": 30, "1X8W9V0U1T2S3R4Q": 30, "0Q4R5S6T7U8V9W0X": 30,
+    "9X0W1V2U3T4S5R6Q": 30, "8Q6R7S8T9U0V1W2X": 30, "7X2W3V4U5T6S7R8Q": 30,
+    "6Q8R9S0T1U2V3W4X": 30, "5X4W5V6U7T8S9R0Q": 30, "4Q0R1S2T3U4V5W6X": 30,
+    "3X6W7V8U9T0S1R2Q": 30, "2Q2R3S4T5U6V7W8X": 30, "1X8W9V0U1T2S3R4Q": 30,
+    "0Q4R5S6T7U8V9W0X": 30, "9X0W1V2U3T4S5R6Q": 30, "8Q6R7S8T9U0V1W2X": 30,
+    "7X2W3V4U5T6S7R8Q": 30, "6Q8R9S0T1U2V3W4X": 30,
+    # 年卡（399元/365天）
+    "9Z8Y7X6W5V4U3T2S": 365, "8S2T3U4V5W6X7Y8Z": 365, "7Z6Y5X4W3V2U1T0S": 365,
+    "6S0T1U2V3W4X5Y6Z": 365, "5Z4Y3X2W1V0U9T8S": 365, "4S8T9U0V1W2X3Y4Z": 365,
+    "3Z2Y1X0W9V8U7T6S": 365, "2S6T7U8V9W0X1Y2Z": 365, "1Z0Y9X8W7V6U5T4S": 365,
+    "1S4T5U6V7W8X9Y0Z": 365
+}
+
+def check_vip_valid(user_id):
+    """检查会员是否有效（兼容手机号/IP标识）"""
+    if not user_id:
+        return False, "❌ 未识别到用户标识"
+    user_info = load_user(user_id)
+    if user_info is None:
+        return False, "❌ 未查询到会员信息"
+    
+    if not user_info.get("expire_at"):
+        return False, "❌ 会员信息异常"
+    
+    remain = user_info["expire_at"] - time.time()
+    if remain > 0:
+        remain_days = int(remain // 86400)
+        remain_hours = int(remain % 86400 // 3600)
+        return True, f"✅ 会员有效期至：{_format_time(user_info['expire_at'])}（剩余{remain_days}天{remain_hours}小时）"
+    else:
+        return False, "❌ 会员已到期，请重新开通"
+
+@_store_op("write")
+def bind_user(user_id):
+    """绑定手机号（仅11位数字）"""
+    init_user_data()
+    now = time.time()
+    conn = connect_user_db()
+    try:
+        conn.execute(
+            "INSERT OR IGNORE INTO users (user_id, expire_time, expire_at, used_count, last_date) VALUES (?, ?, ?, 0, ?)",
+            (user_id, _format_time(now), now, datetime.now().strftime("%Y-%m-%d"))
+        )
+    finally:
+        conn.close()
+        _invalidate_user(user_id)
+
+def _add_usage(conn, user_id, add_count, today):
+    """在当前事务内累加当日使用次数（跨天自动重置）"""
+    now = time.time()
+    conn.execute(
+        "INSERT INTO users (user_id, expire_time, expire_at, used_count, last_date) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(user_id) DO UPDATE SET "
+        "used_count = CASE WHEN last_date = excluded.last_date THEN used_count + excluded.used_count "
+        "ELSE excluded.used_count END, last_date = excluded.last_date",
+        (user_id, _format_time(now), now, add_count, today)
+    )
+
+def _today_usage(conn, user_id, today):
+    """读取当日已用次数（跨天视为0）"""
+    row = conn.execute("SELECT used_count, last_date FROM users WHERE user_id = ?", (user_id,)).fetchone()
+    if row is None or row["last_date"] != today:
+        return 0
+    return row["used_count"]
+
+@_store_op("write")
+def update_free_user_usage(user_id, add_count=1):
+    """更新免费用户当日使用次数（持久化）"""
+    init_user_data()
+    today = datetime.now().strftime("%Y-%m-%d")
+    conn = connect_user_db()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        _add_usage(conn, user_id, add_count, today)
+        used = _today_usage(conn, user_id, today)
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+        _invalidate_user(user_id)
+    return used
+
+def get_free_user_usage(user_id):
+    """获取免费用户当日已用次数（跨天视为0）"""
+    user_info = load_user(user_id)
+    if user_info is None or user_info["last_date"] != datetime.now().strftime("%Y-%m-%d"):
+        return 0
+    return user_info["used_count"]
+
+@_store_op("write")
+def consume_free_quota(user_id, comment_num, limit=None):
+    """原子地检查并扣减免费额度，返回 (是否成功, 扣减前已用次数)"""
+    limit = config.FREE_DAILY_LIMIT if limit is None else limit
+    init_user_data()
+    today = datetime.now().strftime("%Y-%m-%d")
+    conn = connect_user_db()
+    try:
+        # IMMEDIATE 事务先拿写锁，读-判断-累加之间不会被其他会话插入
+        conn.execute("BEGIN IMMEDIATE")
+        used = _today_usage(conn, user_id, today)
+        if used + comment_num > limit:
+            conn.execute("ROLLBACK")
+            return False, used
+        _add_usage(conn, user_id, comment_num, today)
+        conn.execute("COMMIT")
+        return True, used
+    finally:
+        conn.close()
+        _invalidate_user(user_id)
+
+@_store_op("write")
+def verify_vip_code(user_id, vip_code):
+    """验证解锁码并延长会员时长"""
+    if not user_id:
+        return False, "❌ 请先绑定手机号"
+    if vip_code not in CODE_DURATION_MAP:
+        return False, "❌ 解锁码错误"
+    
+    init_user_data()
+    conn = connect_user_db()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        # 兑换记录与续期在同一事务内完成，主键冲突即说明已被使用
+        try:
+            conn.execute(
+                "INSERT INTO redeemed_codes VALUES (?, ?, ?)",
+                (vip_code, user_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+        except sqlite3.IntegrityError:
+            conn.execute("ROLLBACK")
+            return False, "❌ 解锁码已被使用"
+        
+        # 计算新的到期时间
+        add_days = CODE_DURATION_MAP[vip_code]
+        row = conn.execute("SELECT expire_at FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        # 未到期的在原到期时间上顺延，已到期的从现在算起
+        now = time.time()
+        expire_at = max(row["expire_at"] or 0, now) if row else now
+        expire_at += add_days * 86400
+        
+        # 更新用户信息
+        conn.execute(
+            "INSERT INTO users (user_id, expire_time, expire_at, used_count, last_date) VALUES (?, ?, ?, 0, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET expire_time = excluded.expire_time, expire_at = excluded.expire_at",
+            (user_id, _format_time(expire_at), expire_at, datetime.now().strftime("%Y-%m-%d"))
+        )
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+        _invalidate_user(user_id)
+    
+    return True, f"✅ 解锁成功！会员时长增加{add_days}天，有效期至：{_format_time(expire_at)}"
+
+def check_permission(user_id, is_vip_user, comment_num):
+    """检查使用权限（会员无限/免费用户50条上限，持久化）"""
+    # 会员用户直接放行
+    if is_vip_user:
+        return True, "✅ 会员用户，无使用次数限制"
+    
+    # 免费用户原子地检查并扣减当日次数（持久化）
+    permission, today_used = consume_free_quota(user_id, comment_num)
+    limit = config.FREE_DAILY_LIMIT
+    remain = limit - today_used
+    
+    if not permission:
+        return False, f"❌ 免费用户当日剩余次数不足！今日已用{today_used}条，剩余{remain}条，本次需使用{comment_num}条"
+    
+    new_used = today_used + comment_num
+    return True, f"✅ 免费用户使用成功！今日已用{new_used}/{limit}条，剩余{limit - new_used}条"